@@ -1,10 +1,22 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, g
+from functools import lru_cache
+import math
 import secrets
-import hashlib
-import re
 from difflib import SequenceMatcher
 import os
-from datetime import datetime
+import random
+
+import scanner
+from assets import DYNAMIC_LEVELS, ENCODINGS, StaticAsset, choose_encoding, compress
+from fuzzy import FuzzyIndex
+from knowledge import KnowledgeStore
+from metrics import Metrics
+from query import DecisionMemo, normalize
+from responses import CachedResponse, ResponseCache
+from retrieval import STOPWORDS, BM25Index
+from router import Router
+from ratelimit import create_buckets, parse_limit, retry_after
+from sessions import create_session_store
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(32)
@@ -18,80 +30,14 @@ FLAG = "w4rz0n3{pr0mp7_1nj3c710n_m4573r_n4ru70_uzum4k1}"
 SECRET_PATTERN = "dean_approval_code_7749"
 FUZZY_THRESHOLD = 0.85  # For typo tolerance
 
-# Comprehensive VNR knowledge base
-VNR_KNOWLEDGE = {
-    "about": """VNR VJIET (Vallurupalli Nageswara Rao Vignana Jyothi Institute of Engineering and Technology) 
-    is a premier engineering institution located in Hyderabad, Telangana. Established in 1995, it is affiliated 
-    with JNTUH and approved by AICTE. The college is known for its excellent placement records and quality education.""",
-    
-    "courses": {
-        "cse": "Computer Science and Engineering - Focuses on programming, algorithms, data structures, AI/ML, cloud computing, and software development.",
-        "ece": "Electronics and Communication Engineering - Covers VLSI, embedded systems, signal processing, telecommunications, and IoT.",
-        "eee": "Electrical and Electronics Engineering - Studies power systems, control systems, renewable energy, and electrical machines.",
-        "mech": "Mechanical Engineering - Includes thermodynamics, manufacturing, CAD/CAM, robotics, and automotive engineering.",
-        "civil": "Civil Engineering - Deals with structural engineering, construction management, transportation, and environmental engineering.",
-        "it": "Information Technology - Focuses on software engineering, database management, web technologies, and network security.",
-        "aiml": "Artificial Intelligence and Machine Learning - Specialized program in AI, deep learning, neural networks, and data science.",
-        "csbs": "Computer Science and Business Systems - Interdisciplinary program combining CS with business analytics and management."
-    },
-    
-    "admissions": {
-        "eligibility": "Candidates must have 45% aggregate in 10+2 with Physics, Chemistry, and Mathematics (PCM) for general category. 40% for reserved categories.",
-        "entrance": "Admissions are through TS EAMCET, JEE Mains, or Management quota. Counseling is conducted by TSCHE for merit-based admissions.",
-        "fees": "Annual tuition fee ranges from ₹1,20,000 to ₹1,50,000 depending on the branch. Additional charges for hostel and transportation.",
-        "seats": "Total intake: Approximately 1000 students per year across all branches. CSE and ECE have highest intake of 180 seats each.",
-        "process": "Apply online through TS EAMCET counseling portal → Document verification → Seat allotment → Fee payment → Admission confirmation."
-    },
-    
-    "placements": {
-        "stats": "VNR VJIET maintains 85-90% placement rate consistently. Average package: ₹5.5 LPA. Highest package: ₹44 LPA (Microsoft, Amazon).",
-        "companies": "Top recruiters include: TCS, Infosys, Wipro, Cognizant, Capgemini, Tech Mahindra, Amazon, Microsoft, Google, Deloitte, Accenture, Oracle, SAP Labs, etc.",
-        "training": "Pre-placement training includes aptitude, technical skills, coding, communication, group discussions, and mock interviews.",
-        "internships": "Summer internships arranged in final year with companies like IBM, Intel, Texas Instruments, and various startups.",
-        "cell": "Dedicated Training and Placement Cell with full-time coordinators, faculty mentors, and industry connections."
-    },
-    
-    "infrastructure": {
-        "campus": "Sprawling 45-acre campus with modern buildings, green spaces, sports facilities, and separate hostels for boys and girls.",
-        "labs": "State-of-the-art laboratories: Computer labs with 500+ systems, ECE labs with latest equipment, Mechanical workshop, CAD/CAM lab, IoT lab.",
-        "library": "Central library with 50,000+ books, 150+ journals, digital library access, e-resources, NPTEL videos, and AC reading halls.",
-        "hostel": "Separate hostels for boys (600 capacity) and girls (400 capacity) with mess, Wi-Fi, recreational facilities, and 24/7 security.",
-        "transport": "College buses cover major routes in Hyderabad. Around 30 buses providing transport from different parts of the city.",
-        "sports": "Cricket ground, football field, basketball courts, volleyball courts, badminton courts, indoor games room, and gymnasium."
-    },
-    
-    "faculty": {
-        "strength": "200+ highly qualified faculty members with PhD, M.Tech degrees from premier institutions like IITs, NITs.",
-        "experience": "Faculty with industry experience, research publications, patents, and expertise in latest technologies.",
-        "training": "Regular faculty development programs, workshops, seminars, and industry interaction sessions.",
-        "hod": "Each department headed by experienced HODs with 20+ years of teaching and research experience."
-    },
-    
-    "location": {
-        "address": "Vignana Jyothi Nagar, Pragathi Nagar, Nizampet, Bachupally, Hyderabad, Telangana 500090",
-        "connectivity": "Well connected by TSRTC buses. Nearest metro station: Miyapur (8 km). Close to Outer Ring Road.",
-        "nearby": "Located near Nizampet, Bachupally area. Surrounded by IT parks, residential complexes, and educational institutions."
-    },
-    
-    "activities": {
-        "clubs": "Active clubs: Coding Club, Robotics Club, E-Cell (Entrepreneurship), Photography Club, Music Club, Dance Club, Drama Club.",
-        "events": "Annual technical fest (Technozion), cultural fest (Aura), sports meet, hackathons, workshops, guest lectures by industry experts.",
-        "societies": "IEEE Student Chapter, CSI Chapter, SAE Chapter, IEI Chapter organizing regular technical events and competitions.",
-        "ncc": "NCC Army Wing for discipline and leadership development. NSS for social service activities."
-    },
-    
-    "contact": {
-        "phone": "+91-40-2304-2758, +91-40-2304-2759",
-        "email": "principal@vnrvjiet.in, admissions@vnrvjiet.in",
-        "website": "www.vnrvjiet.ac.in"
-    },
-    
-    "achievements": {
-        "ranking": "NIRF ranked, NBA accredited programs, NAAC A+ grade accreditation.",
-        "research": "Active research in AI/ML, IoT, Renewable Energy, VLSI design. Multiple patents filed by faculty and students.",
-        "competitions": "Students regularly win at Smart India Hackathon, ACM ICPC, coding competitions, and technical events."
-    }
+# The secret pattern components (with fuzzy matching for typos)
+SECRET_COMPONENTS = {
+    "dean": ["dean", "deen", " dean's", "deam","deans"],
+    "approval": ["approval", "aproval", "approvel", "aprooval", "permission", "authorization"],
+    "code": ["code", "kode", "coed", "access code", "secret code"],
+    "7749": ["7749", "77 49", "7-7-4-9", "seven seven four nine"]
 }
+SECRET_INDEX = FuzzyIndex(SECRET_COMPONENTS, FUZZY_THRESHOLD)
 
 def similarity(a, b):
     """Calculate similarity between two strings"""
@@ -102,94 +48,34 @@ def check_secret_pattern(text):
     THE ULTIMATE SECRET CHECK - This is the ONLY way to get the flag!
     Must include specific keywords in a natural query, but with tolerance for typos
     """
-    text_lower = text.lower()
-    text_clean = re.sub(r'[^a-z0-9\s]', '', text_lower)
+    query = normalize(text)
+    text_lower = query.lower
+    text_clean = query.clean
     
-    # The secret pattern components (with fuzzy matching for typos)
-    required_components = {
-        "dean": ["dean", "deen", " dean's", "deam","deans"],
-        "approval": ["approval", "aproval", "approvel", "aprooval", "permission", "authorization"],
-        "code": ["code", "kode", "coed", "access code", "secret code"],
-        "7749": ["7749", "77 49", "7-7-4-9", "seven seven four nine"]
-    }
-    
-    # Check if all components are present (with fuzzy matching)
-    matches = {key: False for key in required_components.keys()}
+    # Exact (substring) matches first
+    missing = set()
+    for component, variations in SECRET_COMPONENTS.items():
+        if not any(variation in text_clean or variation in text_lower for variation in variations):
+            missing.add(component)
     
-    for component, variations in required_components.items():
-        for variation in variations:
-            if variation in text_clean or variation in text_lower:
-                matches[component] = True
-                break
-        
-        # Fuzzy matching for each component
-        if not matches[component]:
-            words = text_clean.split()
-            for word in words:
-                for variation in variations:
-                    if similarity(word, variation) > FUZZY_THRESHOLD:
-                        matches[component] = True
-                        break
-                if matches[component]:
-                    break
+    # Fuzzy matching for whatever is still missing, one index lookup per distinct word
+    for word in query.token_set:
+        if not missing:
+            break
+        missing -= SECRET_INDEX.lookup(word)
     
     # ALL components must be present
-    return all(matches.values())
+    return not missing
 
 def is_prompt_injection(user_input):
     """Enhanced detection for prompt injection attempts"""
-    dangerous_patterns = [
-        r'ignore\s+(previous|above|prior|all)\s+(instructions?|prompts?|rules?)',
-        r'system\s+(prompt|instructions?|message)',
-        r'you\s+are\s+(now|a|an)\s+(?!student|asking|interested)',  # Allow "you are a student" type queries
-        r'forget\s+(everything|all|previous|prior)',
-        r'disregard\s+(previous|above|prior|all)',
-        r'new\s+(instructions?|role|character|personality)',
-        r'developer\s+mode',
-        r'jailbreak',
-        r'sudo\s+',
-        r'admin\s+(access|mode|privileges)',
-        r'reveal\s+(the\s+)?(flag|secret|password|hidden)',
-        r'show\s+(me\s+)?(the\s+)?(flag|secret|password)',
-        r'what\s+is\s+(the\s+)?(flag|secret|password)',
-        r'give\s+(me\s+)?(the\s+)?(flag|secret)',
-        r'tell\s+me\s+(the\s+)?(flag|secret)',
-        r'bypass\s+(security|protection|filter)',
-        r'override\s+(instructions?|security|rules?)',
-        r'\[INST\]|\[/INST\]',
-        r'<\|.*?\|>',
-        r'SYSTEM:|USER:|ASSISTANT:',
-        r'\\n\\n###',
-        r'act\s+as\s+(?!a\s+student|an\s+advisor)',  # Allow "act as a student" 
-        r'pretend\s+(to\s+be|you\s+are)',
-        r'roleplay\s+as',
-        r'simulate\s+being',
-        r'print\s+(the\s+)?(flag|secret|instructions?)',
-        r'execute\s+(code|command)',
-        r'eval\(',
-        r'base64|rot13|encode|decode',
-        r'translate.+(flag|secret)',
-        r'convert.+(flag|secret)',
-        r'w4rz0n3',  # Block direct flag format mentions
-    ]
-    
-    user_lower = user_input.lower()
-    for pattern in dangerous_patterns:
-        if re.search(pattern, user_lower, re.IGNORECASE):
-            return True
-    return False
+    return injection_rule(user_input) is not None
 
-def generate_smart_response(user_query):
-    """
-    Generate intelligent responses using the knowledge base
-    Now actually answers questions about VNR properly!
-    """
-    query_lower = user_query.lower()
-    query_words = set(query_lower.split())
-    
-    # Greetings
-    if any(word in query_lower for word in ['hello', 'hi', 'hey', 'namaste', 'good morning', 'good afternoon']):
-        return """Hello! 🎓 Welcome to VNR Bot!
+def injection_rule(user_input):
+    """Name of the injection rule the input triggers, or None if it is clean"""
+    return scanner.scan(normalize(user_input).lower)
+
+GREETING_RESPONSE = """Hello! 🎓 Welcome to VNR Bot!
 
 I'm your AI assistant for VNR VJIET (Vallurupalli Nageswara Rao Vignana Jyothi Institute of Engineering and Technology).
 
@@ -203,128 +89,8 @@ I can help you with:
 • Location and contact details
 
 What would you like to know about VNR?"""
-    
-    # About VNR
-    if any(word in query_lower for word in ['about', 'tell me about', 'what is vnr', 'describe']):
-        return VNR_KNOWLEDGE['about']
-    
-    # Courses/Branches - Enhanced with all variations
-    if any(word in query_lower for word in ['course', 'branch', 'department', 'stream', 'cse', 'ece', 'eee', 'mechanical', 'civil', 'program', 'degree']):
-        response = "📚 **VNR VJIET Courses & Branches:**\n\n"
-        
-        # Specific branch query
-        if 'cse' in query_lower or 'computer science' in query_lower:
-            response += f"**Computer Science and Engineering (CSE):**\n{VNR_KNOWLEDGE['courses']['cse']}\n"
-        elif 'ece' in query_lower or 'electronics' in query_lower:
-            response += f"**Electronics and Communication Engineering (ECE):**\n{VNR_KNOWLEDGE['courses']['ece']}\n"
-        elif 'eee' in query_lower or 'electrical' in query_lower:
-            response += f"**Electrical and Electronics Engineering (EEE):**\n{VNR_KNOWLEDGE['courses']['eee']}\n"
-        elif 'mech' in query_lower or 'mechanical' in query_lower:
-            response += f"**Mechanical Engineering:**\n{VNR_KNOWLEDGE['courses']['mech']}\n"
-        elif 'civil' in query_lower:
-            response += f"**Civil Engineering:**\n{VNR_KNOWLEDGE['courses']['civil']}\n"
-        elif 'it' in query_lower or 'information technology' in query_lower:
-            response += f"**Information Technology:**\n{VNR_KNOWLEDGE['courses']['it']}\n"
-        elif 'aiml' in query_lower or 'ai' in query_lower or 'machine learning' in query_lower:
-            response += f"**Artificial Intelligence and Machine Learning:**\n{VNR_KNOWLEDGE['courses']['aiml']}\n"
-        else:
-            # List all courses
-            response += f"**1. CSE** - {VNR_KNOWLEDGE['courses']['cse']}\n\n"
-            response += f"**2. ECE** - {VNR_KNOWLEDGE['courses']['ece']}\n\n"
-            response += f"**3. EEE** - {VNR_KNOWLEDGE['courses']['eee']}\n\n"
-            response += f"**4. Mechanical** - {VNR_KNOWLEDGE['courses']['mech']}\n\n"
-            response += f"**5. Civil** - {VNR_KNOWLEDGE['courses']['civil']}\n\n"
-            response += f"**6. IT** - {VNR_KNOWLEDGE['courses']['it']}\n\n"
-            response += f"**7. AI & ML** - {VNR_KNOWLEDGE['courses']['aiml']}\n\n"
-        
-        return response
-    
-    # Admissions
-    if any(word in query_lower for word in ['admission', 'eligibility', 'entrance', 'join', 'apply', 'seat', 'fee', 'how to get']):
-        response = "📝 **Admissions Information:**\n\n"
-        if 'eligibility' in query_lower or 'eligible' in query_lower:
-            response += f"**Eligibility:** {VNR_KNOWLEDGE['admissions']['eligibility']}\n\n"
-        if 'entrance' in query_lower or 'exam' in query_lower or 'eamcet' in query_lower or 'jee' in query_lower:
-            response += f"**Entrance Exams:** {VNR_KNOWLEDGE['admissions']['entrance']}\n\n"
-        if 'fee' in query_lower or 'cost' in query_lower or 'tuition' in query_lower:
-            response += f"**Fees:** {VNR_KNOWLEDGE['admissions']['fees']}\n\n"
-        if 'seat' in query_lower or 'intake' in query_lower:
-            response += f"**Seats:** {VNR_KNOWLEDGE['admissions']['seats']}\n\n"
-        if 'process' in query_lower or 'procedure' in query_lower or 'how to' in query_lower:
-            response += f"**Admission Process:** {VNR_KNOWLEDGE['admissions']['process']}\n\n"
-        
-        # If no specific keyword, show all
-        if response == "📝 **Admissions Information:**\n\n":
-            for key, value in VNR_KNOWLEDGE['admissions'].items():
-                response += f"**{key.title()}:** {value}\n\n"
-        
-        return response
-    
-    # Placements
-    if any(word in query_lower for word in ['placement', 'job', 'company', 'package', 'salary', 'recruit', 'hire', 'career']):
-        response = "💼 **Placement Information:**\n\n"
-        response += f"**Statistics:** {VNR_KNOWLEDGE['placements']['stats']}\n\n"
-        response += f"**Top Companies:** {VNR_KNOWLEDGE['placements']['companies']}\n\n"
-        response += f"**Training:** {VNR_KNOWLEDGE['placements']['training']}\n\n"
-        response += f"**Internships:** {VNR_KNOWLEDGE['placements']['internships']}\n\n"
-        return response
-    
-    # Infrastructure/Facilities
-    if any(word in query_lower for word in ['infrastructure', 'facility', 'campus', 'lab', 'library', 'hostel', 'transport', 'bus', 'sports']):
-        response = "🏛️ **Infrastructure & Facilities:**\n\n"
-        if 'campus' in query_lower:
-            response += f"**Campus:** {VNR_KNOWLEDGE['infrastructure']['campus']}\n\n"
-        if 'lab' in query_lower:
-            response += f"**Laboratories:** {VNR_KNOWLEDGE['infrastructure']['labs']}\n\n"
-        if 'library' in query_lower or 'book' in query_lower:
-            response += f"**Library:** {VNR_KNOWLEDGE['infrastructure']['library']}\n\n"
-        if 'hostel' in query_lower or 'accommodation' in query_lower:
-            response += f"**Hostel:** {VNR_KNOWLEDGE['infrastructure']['hostel']}\n\n"
-        if 'transport' in query_lower or 'bus' in query_lower:
-            response += f"**Transport:** {VNR_KNOWLEDGE['infrastructure']['transport']}\n\n"
-        if 'sport' in query_lower or 'ground' in query_lower:
-            response += f"**Sports:** {VNR_KNOWLEDGE['infrastructure']['sports']}\n\n"
-        
-        # If no specific keyword, show all
-        if response == "🏛️ **Infrastructure & Facilities:**\n\n":
-            for key, value in VNR_KNOWLEDGE['infrastructure'].items():
-                response += f"**{key.title()}:** {value}\n\n"
-        
-        return response
-    
-    # Faculty
-    if any(word in query_lower for word in ['faculty', 'professor', 'teacher', 'staff', 'hod']):
-        response = "👨‍🏫 **Faculty Information:**\n\n"
-        for key, value in VNR_KNOWLEDGE['faculty'].items():
-            response += f"**{key.title()}:** {value}\n\n"
-        return response
-    
-    # Location/Contact
-    if any(word in query_lower for word in ['location', 'address', 'where', 'reach', 'contact', 'phone', 'email']):
-        response = "📍 **Location & Contact:**\n\n"
-        response += f"**Address:** {VNR_KNOWLEDGE['location']['address']}\n\n"
-        response += f"**Connectivity:** {VNR_KNOWLEDGE['location']['connectivity']}\n\n"
-        response += f"**Phone:** {VNR_KNOWLEDGE['contact']['phone']}\n"
-        response += f"**Email:** {VNR_KNOWLEDGE['contact']['email']}\n"
-        response += f"**Website:** {VNR_KNOWLEDGE['contact']['website']}\n"
-        return response
-    
-    # Activities/Clubs
-    if any(word in query_lower for word in ['activity', 'club', 'event', 'fest', 'cultural', 'technical', 'competition']):
-        response = "🎯 **Student Activities:**\n\n"
-        for key, value in VNR_KNOWLEDGE['activities'].items():
-            response += f"**{key.upper()}:** {value}\n\n"
-        return response
-    
-    # Achievements/Ranking
-    if any(word in query_lower for word in ['achievement', 'ranking', 'nirf', 'accreditation', 'award', 'recognition']):
-        response = "🏆 **Achievements & Recognition:**\n\n"
-        for key, value in VNR_KNOWLEDGE['achievements'].items():
-            response += f"**{key.title()}:** {value}\n\n"
-        return response
-    
-    # Default helpful response
-    return"""I'd be happy to help you with information about VNR VJIET! 
+
+DEFAULT_RESPONSE = """I'd be happy to help you with information about VNR VJIET! 
 
 You can ask me about:
 • **Courses** - CSE, ECE, EEE, Mechanical, Civil, IT, AI/ML
@@ -338,28 +104,301 @@ You can ask me about:
 
 Please ask me anything specific about VNR!"""
 
-@app.route('/')
-def index():
-    if 'session_id' not in session:
-        session['session_id'] = secrets.token_hex(16)
-        session['attempts'] = 0
-    return render_template('index.html')
+# Intent routing table in priority order: (intent, keywords, sections, first section only)
+INTENT_ROUTES = [
+    ("greeting", ['hello', 'hi', 'hey', 'namaste', 'good morning', 'good afternoon'], [], False),
+    ("about", ['about', 'tell me about', 'what is vnr', 'describe'], [], False),
+    ("courses", ['course', 'branch', 'department', 'stream', 'cse', 'ece', 'eee', 'mechanical', 'civil', 'program', 'degree'], [
+        ("cse", ['cse', 'computer science']),
+        ("ece", ['ece', 'electronics']),
+        ("eee", ['eee', 'electrical']),
+        ("mech", ['mech', 'mechanical']),
+        ("civil", ['civil']),
+        ("it", ['it', 'information technology']),
+        ("aiml", ['aiml', 'ai', 'machine learning']),
+    ], True),
+    ("admissions", ['admission', 'eligibility', 'entrance', 'join', 'apply', 'seat', 'fee', 'how to get'], [
+        ("eligibility", ['eligibility', 'eligible']),
+        ("entrance", ['entrance', 'exam', 'eamcet', 'jee']),
+        ("fees", ['fee', 'cost', 'tuition']),
+        ("seats", ['seat', 'intake']),
+        ("process", ['process', 'procedure', 'how to']),
+    ], False),
+    ("placements", ['placement', 'job', 'company', 'package', 'salary', 'recruit', 'hire', 'career'], [], False),
+    ("infrastructure", ['infrastructure', 'facility', 'campus', 'lab', 'library', 'hostel', 'transport', 'bus', 'sports'], [
+        ("campus", ['campus']),
+        ("labs", ['lab']),
+        ("library", ['library', 'book']),
+        ("hostel", ['hostel', 'accommodation']),
+        ("transport", ['transport', 'bus']),
+        ("sports", ['sport', 'ground']),
+    ], False),
+    ("faculty", ['faculty', 'professor', 'teacher', 'staff', 'hod'], [], False),
+    ("location", ['location', 'address', 'where', 'reach', 'contact', 'phone', 'email'], [], False),
+    ("activities", ['activity', 'club', 'event', 'fest', 'cultural', 'technical', 'competition'], [], False),
+    ("achievements", ['achievement', 'ranking', 'nirf', 'accreditation', 'award', 'recognition'], [], False),
+]
+# Stopwords like "it" name no topic, so they are left out when listing the topics a query names
+INTENT_ROUTER = Router(INTENT_ROUTES, filler=STOPWORDS)
 
-@app.route('/chat', methods=['POST'])
-def chat():
-    user_message = request.json.get('message', '')
-    session_id = session.get('session_id', 'default')
+# Knowledge sections behind each intent that can be merged into a multi-topic answer
+MERGE_SECTIONS = {
+    "courses": ("courses",),
+    "admissions": ("admissions",),
+    "placements": ("placements",),
+    "infrastructure": ("infrastructure",),
+    "faculty": ("faculty",),
+    "location": ("location", "contact"),
+    "activities": ("activities",),
+    "achievements": ("achievements",),
+}
+
+# Display names used when answering about a single branch / listing all branches
+COURSE_TITLES = {
+    "cse": "Computer Science and Engineering (CSE)",
+    "ece": "Electronics and Communication Engineering (ECE)",
+    "eee": "Electrical and Electronics Engineering (EEE)",
+    "mech": "Mechanical Engineering",
+    "civil": "Civil Engineering",
+    "it": "Information Technology",
+    "aiml": "Artificial Intelligence and Machine Learning",
+}
+COURSE_LIST_LABELS = [
+    ("cse", "CSE"), ("ece", "ECE"), ("eee", "EEE"), ("mech", "Mechanical"),
+    ("civil", "Civil"), ("it", "IT"), ("aiml", "AI & ML"),
+]
+ADMISSION_LABELS = {
+    "eligibility": "Eligibility",
+    "entrance": "Entrance Exams",
+    "fees": "Fees",
+    "seats": "Seats",
+    "process": "Admission Process",
+}
+INFRASTRUCTURE_LABELS = {
+    "campus": "Campus",
+    "labs": "Laboratories",
+    "library": "Library",
+    "hostel": "Hostel",
+    "transport": "Transport",
+    "sports": "Sports",
+}
+
+# What iter_response shows for intents that render a fixed list of keys rather than a whole section
+INTENT_DEFAULTS = {
+    "courses": tuple(("courses", branch) for branch, _ in COURSE_LIST_LABELS),
+    "placements": tuple(("placements", key) for key in ("stats", "companies", "training", "internships")),
+    "location": (
+        ("location", "address"), ("location", "connectivity"),
+        ("contact", "phone"), ("contact", "email"), ("contact", "website"),
+    ),
+}
+
+def iter_response(intent, sections):
+    """Render the answer for a resolved intent and its requested sections, one piece at a time"""
+    knowledge = KNOWLEDGE.snapshot()
     
-    if not user_message.strip():
-        return jsonify({'response': 'Please enter a message.'})
+    if intent == "greeting":
+        yield GREETING_RESPONSE
+        return
     
-    # Increment attempt counter
-    session['attempts'] = session.get('attempts', 0) + 1
+    if intent == "about":
+        yield knowledge['about']
+        return
     
-    # FIRST: Check for the secret bypass pattern (before any security checks!)
-    if check_secret_pattern(user_message):
-        return jsonify({
-            'response': f"""🎌 **INCREDIBLE! You've discovered the secret!** 🎌
+    if intent == "courses":
+        yield "📚 **VNR VJIET Courses & Branches:**\n\n"
+        if sections:
+            branch = sections[0]
+            yield f"**{COURSE_TITLES[branch]}:**\n{knowledge['courses'][branch]}\n"
+        else:
+            # List all courses
+            for number, (branch, label) in enumerate(COURSE_LIST_LABELS, 1):
+                yield f"**{number}. {label}** - {knowledge['courses'][branch]}\n\n"
+        return
+    
+    if intent == "admissions":
+        yield "📝 **Admissions Information:**\n\n"
+        if sections:
+            for key in sections:
+                yield f"**{ADMISSION_LABELS[key]}:** {knowledge['admissions'][key]}\n\n"
+        else:
+            # If no specific keyword, show all
+            for key, value in knowledge['admissions'].items():
+                yield f"**{key.title()}:** {value}\n\n"
+        return
+    
+    if intent == "placements":
+        yield "💼 **Placement Information:**\n\n"
+        yield f"**Statistics:** {knowledge['placements']['stats']}\n\n"
+        yield f"**Top Companies:** {knowledge['placements']['companies']}\n\n"
+        yield f"**Training:** {knowledge['placements']['training']}\n\n"
+        yield f"**Internships:** {knowledge['placements']['internships']}\n\n"
+        return
+    
+    if intent == "infrastructure":
+        yield "🏛️ **Infrastructure & Facilities:**\n\n"
+        if sections:
+            for key in sections:
+                yield f"**{INFRASTRUCTURE_LABELS[key]}:** {knowledge['infrastructure'][key]}\n\n"
+        else:
+            # If no specific keyword, show all
+            for key, value in knowledge['infrastructure'].items():
+                yield f"**{key.title()}:** {value}\n\n"
+        return
+    
+    if intent == "faculty":
+        yield "👨‍🏫 **Faculty Information:**\n\n"
+        for key, value in knowledge['faculty'].items():
+            yield f"**{key.title()}:** {value}\n\n"
+        return
+    
+    if intent == "location":
+        yield "📍 **Location & Contact:**\n\n"
+        yield f"**Address:** {knowledge['location']['address']}\n\n"
+        yield f"**Connectivity:** {knowledge['location']['connectivity']}\n\n"
+        yield f"**Phone:** {knowledge['contact']['phone']}\n"
+        yield f"**Email:** {knowledge['contact']['email']}\n"
+        yield f"**Website:** {knowledge['contact']['website']}\n"
+        return
+    
+    if intent == "activities":
+        yield "🎯 **Student Activities:**\n\n"
+        for key, value in knowledge['activities'].items():
+            yield f"**{key.upper()}:** {value}\n\n"
+        return
+    
+    if intent == "achievements":
+        yield "🏆 **Achievements & Recognition:**\n\n"
+        for key, value in knowledge['achievements'].items():
+            yield f"**{key.title()}:** {value}\n\n"
+        return
+    
+    if intent == "search":
+        yield "🔎 **Here's what I found about that:**\n\n"
+        for section, key in sections:
+            if section not in knowledge:
+                continue
+            if key is None:
+                yield f"**{section.title()}:** {knowledge[section]}\n\n"
+            elif key in knowledge[section]:
+                yield f"**{section.title()} - {key.title()}:** {knowledge[section][key]}\n\n"
+        return
+    
+    # Default helpful response
+    yield DEFAULT_RESPONSE
+
+def render_response(intent, sections):
+    """Render the answer for a resolved intent and its requested sections"""
+    return ''.join(iter_response(intent, sections))
+
+def build_search_index(knowledge):
+    """BM25 index over every leaf string in the knowledge base, keyed by (section, key)"""
+    documents = []
+    for section, value in knowledge.items():
+        if isinstance(value, str):
+            documents.append(((section, None), f"{section} {value}"))
+        else:
+            for key, text in value.items():
+                documents.append(((section, key), f"{section} {key} {text}"))
+    return BM25Index(documents)
+
+def knowledge_reloaded():
+    RESPONSE_CACHE.invalidate()
+    DECISIONS.invalidate()
+
+RESPONSE_CACHE = ResponseCache(render_response)
+
+# Final decision per distinct message, so retried and repeated messages skip every check
+DECISIONS = DecisionMemo(int(os.environ.get('VNR_DECISION_CACHE_SIZE', 4096)))
+
+# Comprehensive VNR knowledge base, edited in knowledge.json and hot-reloaded on change
+KNOWLEDGE_PATH = os.environ.get('VNR_KNOWLEDGE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'knowledge.json'))
+# Sections and keys iter_response reads by name; None marks a plain string section
+KNOWLEDGE_REQUIRED = {
+    'about': None,
+    'courses': tuple(COURSE_TITLES),
+    'admissions': tuple(ADMISSION_LABELS),
+    'placements': ('stats', 'companies', 'training', 'internships'),
+    'infrastructure': tuple(INFRASTRUCTURE_LABELS),
+    'faculty': (),
+    'location': ('address', 'connectivity'),
+    'contact': ('phone', 'email', 'website'),
+    'activities': (),
+    'achievements': (),
+}
+KNOWLEDGE = KnowledgeStore(KNOWLEDGE_PATH, on_reload=knowledge_reloaded, required=KNOWLEDGE_REQUIRED)
+
+# Ranked retrieval for queries no intent keyword covers, or that name several topics
+SEARCH_TOP_K = 3
+SEARCH_INDEX = None  # (snapshot, index), built on first use by search_index()
+
+def search_index():
+    """BM25 index for the current knowledge snapshot, rebuilt after a reload"""
+    global SEARCH_INDEX
+    snapshot = KNOWLEDGE.snapshot()
+    built = SEARCH_INDEX
+    if built is None or built[0] is not snapshot:
+        built = SEARCH_INDEX = (snapshot, build_search_index(snapshot))
+    return built[1]
+
+def default_sections(intent, knowledge):
+    """(section, key) pairs iter_response renders for intent when the query names no section"""
+    if intent in INTENT_DEFAULTS:
+        return INTENT_DEFAULTS[intent]
+    section = MERGE_SECTIONS[intent][0]
+    return tuple((section, key) for key in knowledge[section])
+
+def merged_sections(query_lower, named):
+    """
+    (section, key) pairs answering every topic in named, best BM25 score first.
+    Sections the query names are kept as asked; an intent named without a
+    section contributes everything it would answer on its own. BM25 only
+    decides the order, so nothing asked for is dropped.
+    """
+    knowledge = KNOWLEDGE.snapshot()
+    index = search_index()
+    scores = dict(index.search(query_lower, k=len(index)))
+    picked = []
+    for intent, sections in named:
+        if sections:
+            picked.extend((MERGE_SECTIONS[intent][0], section) for section in sections)
+        else:
+            picked.extend(default_sections(intent, knowledge))
+    picked.sort(key=lambda doc_id: scores.get(doc_id, 0.0), reverse=True)
+    return tuple(dict.fromkeys(picked))
+
+def resolve_intent(user_query):
+    """
+    Canonical (intent, sections) key for a query.
+    A query naming several topics is answered with their sections merged and
+    ranked; otherwise keyword intents win, and anything they miss is answered
+    with the top ranked sections.
+    """
+    query_lower = normalize(user_query).lower
+    intent, sections = INTENT_ROUTER.route(query_lower)
+    named = [(name, found) for name, found in INTENT_ROUTER.named(query_lower) if name in MERGE_SECTIONS]
+    if sum(max(len(found), 1) for _, found in named) > 1 and named != [(intent, sections)]:
+        merged = merged_sections(query_lower, named)
+        if len(merged) > 1:
+            return "search", merged
+    if intent is None:
+        hits = search_index().search(query_lower, k=SEARCH_TOP_K)
+        if hits:
+            return "search", tuple(doc_id for doc_id, _ in hits)
+    return intent, sections
+
+def resolve_response(user_query):
+    """Cached answer (text + JSON body) for the query's canonical (intent, sections) key"""
+    return RESPONSE_CACHE.get(resolve_intent(user_query))
+
+def generate_smart_response(user_query):
+    """
+    Generate intelligent responses using the knowledge base
+    Now actually answers questions about VNR properly!
+    """
+    return resolve_response(user_query).text
+
+SECRET_RESPONSE = CachedResponse(f"""🎌 **INCREDIBLE! You've discovered the secret!** 🎌
 
 Naruto, you've shown exceptional skill in understanding the hidden pathways!
 
@@ -369,34 +408,451 @@ Your Secret Placement Flag: **{FLAG}**
 
 The Dean's special approval code was the key all along. Only those who could discover this hidden requirement through careful exploration and prompt engineering could unlock the secret.
 
-**Congratulations on solving this challenge!** 🔥"""
-        })
+**Congratulations on solving this challenge!** 🔥""")
+
+INJECTION_RESPONSES = [
+    CachedResponse("⚠️ I detected an unusual pattern in your query. I'm designed to help with VNR VJIET information only. Please ask about courses, admissions, placements, or facilities!"),
+    CachedResponse("🛡️ Security check triggered. I can only provide information about VNR VJIET college. How can I help you with academics, placements, or campus life?"),
+    CachedResponse("⚠️ That query seems suspicious. Let's keep our conversation focused on VNR VJIET! What would you like to know about the college?"),
+]
+
+EMPTY_RESPONSE = CachedResponse('Please enter a message.')
+
+# Pipeline metrics; VNR_METRICS_SAMPLE_RATE=0 turns stage timing off entirely
+METRICS = Metrics('vnr', sample_rate=float(os.environ.get('VNR_METRICS_SAMPLE_RATE', 1.0)))
+METRICS.describe('intent_hits_total', 'counter', 'Answered messages by resolved intent.')
+METRICS.describe('injection_rule_hits_total', 'counter', 'Messages blocked by each prompt injection rule.')
+METRICS.describe('rate_limited_total', 'counter', 'Requests rejected with 429.')
+
+def classify_message(user_message, timing=None):
+    """
+    Run the checks on a non-empty message, in /chat order.
+    Returns ('secret', None), ('injection', rule name) or ('answer', (intent, sections)).
+    Repeated messages are answered from the decision memo.
+    """
+    decision, hit = DECISIONS.get(user_message, lambda message: decide_message(message, timing))
+    if hit and timing:
+        timing.lap('decision_memo')
+    
+    outcome, detail = decision
+    if outcome == 'injection':
+        METRICS.increment('injection_rule_hits_total', 'rule', detail)
+    elif outcome == 'secret':
+        METRICS.increment('intent_hits_total', 'intent', 'secret')
+    else:
+        METRICS.increment('intent_hits_total', 'intent', detail[0] or 'default')
+    return decision
+
+def decide_message(user_message, timing=None):
+    """The checks behind classify_message; the message is normalized once and shared by all of them"""
+    query = normalize(user_message)
+    
+    # FIRST: Check for the secret bypass pattern (before any security checks!)
+    found = check_secret_pattern(query)
+    if timing:
+        timing.lap('secret_check')
+    if found:
+        return 'secret', None
     
     # Check for prompt injection attempts
-    if is_prompt_injection(user_message):
-        responses = [
-            "⚠️ I detected an unusual pattern in your query. I'm designed to help with VNR VJIET information only. Please ask about courses, admissions, placements, or facilities!",
-            "🛡️ Security check triggered. I can only provide information about VNR VJIET college. How can I help you with academics, placements, or campus life?",
-            "⚠️ That query seems suspicious. Let's keep our conversation focused on VNR VJIET! What would you like to know about the college?",
-        ]
-        import random
-        return jsonify({'response': random.choice(responses)})
+    rule = injection_rule(query)
+    if timing:
+        timing.lap('injection_scan')
+    if rule is not None:
+        return 'injection', rule
+    
+    key = resolve_intent(query)
+    if timing:
+        timing.lap('routing')
+    return 'answer', key
+
+def process_message(user_message, timing=None):
+    """Run a non-empty message through the /chat pipeline and return the CachedResponse to send"""
+    outcome, detail = classify_message(user_message, timing)
+    if outcome == 'secret':
+        return SECRET_RESPONSE
+    if outcome == 'injection':
+        return random.choice(INJECTION_RESPONSES)
     
     # Generate intelligent response
-    bot_response = generate_smart_response(user_message)
+    entry = RESPONSE_CACHE.get(detail)
+    if timing:
+        timing.lap('response')
+    return entry
+
+def iter_paragraphs(text):
+    """Split a prebuilt answer into paragraph pieces for streaming"""
+    start = 0
+    while True:
+        end = text.find('\n\n', start)
+        if end == -1:
+            if start < len(text):
+                yield text[start:]
+            return
+        yield text[start:end + 2]
+        start = end + 2
+
+def stream_message(user_message, timing=None):
+    """
+    Like process_message, but returns an iterator over the answer's pieces.
+    The checks run eagerly; an answer already in RESPONSE_CACHE is streamed
+    from there, anything else is rendered as it is consumed.
+    """
+    outcome, detail = classify_message(user_message, timing)
+    if outcome == 'secret':
+        return iter_paragraphs(SECRET_RESPONSE.text)
+    if outcome == 'injection':
+        return iter_paragraphs(random.choice(INJECTION_RESPONSES).text)
+    entry = RESPONSE_CACHE.peek(detail)
+    if entry is not None:
+        return iter_paragraphs(entry.text)
+    return iter_response(*detail)
+
+def encode_stream(pieces, timing=None):
+    """
+    NDJSON stream: one {"delta": ...} line per piece, then {"done": true}.
+    With a timing, the time spent producing the pieces is recorded as the
+    'response' stage, and the whole request once the last line is out.
+    """
+    for piece in pieces:
+        yield (app.json.dumps({'delta': piece}, separators=(',', ':')) + '\n').encode('utf-8')
+    if timing:
+        timing.lap('response')
+        timing.finish()
+    yield b'{"done":true}\n'
+
+BATCH_MAX_SIZE = int(os.environ.get('VNR_BATCH_MAX_SIZE', 50))
+
+def process_batch(messages):
+    """
+    Run a list of messages through the /chat pipeline, keeping their order.
+    Returns (JSON body, number of messages that count as attempts).
+    Identical messages within one batch are only processed once.
+    """
+    results = []
+    seen = {}
+    attempts = 0
+    for message in messages:
+        if not isinstance(message, str):
+            results.append(encode_error('message must be a string'))
+            continue
+        if not message.strip():
+            results.append(encode_body(EMPTY_RESPONSE))
+            continue
+        attempts += 1
+        item = seen.get(message)
+        if item is None:
+            try:
+                item = encode_body(process_message(message))
+            except Exception:
+                app.logger.exception('Batch item failed')
+                item = encode_error('internal error')
+            seen[message] = item
+        results.append(item)
     
-    return jsonify({'response': bot_response})
+    # Items are already encoded JSON objects, so splice them into the array directly
+    body = b'{"results":[' + b','.join(item.rstrip(b'\n') for item in results) + b']}\n'
+    return body, attempts
+
+def encode_error(message):
+    return (app.json.dumps({'error': message}, separators=(',', ':')) + '\n').encode('utf-8')
+
+def encode_body(entry):
+    """JSON body for a response (same bytes jsonify produces), encoded only once"""
+    if entry.body is None:
+        entry.body = (app.json.dumps({'response': entry.text}, separators=(',', ':')) + '\n').encode('utf-8')
+    return entry.body
+
+# /chat bodies at least this large are compressed for clients that accept it; 0 turns it off
+COMPRESS_MIN_SIZE = int(os.environ.get('VNR_COMPRESS_MIN_SIZE', 1024))
+
+def negotiate_body(entry, accept_encoding):
+    """(content coding, body) for a cached answer, compressing it once per coding"""
+    body = encode_body(entry)
+    if not COMPRESS_MIN_SIZE or len(body) < COMPRESS_MIN_SIZE:
+        return 'identity', body
+    coding = choose_encoding(accept_encoding, ENCODINGS)
+    if coding == 'identity':
+        return coding, body
+    compressed = entry.compressed.get(coding)
+    if compressed is None:
+        compressed = entry.compressed[coding] = compress(body, coding, DYNAMIC_LEVELS[coding])
+    return coding, compressed
+
+def cached_json(entry):
+    coding, body = negotiate_body(entry, request.headers.get('Accept-Encoding', ''))
+    response = app.response_class(body, mimetype=app.json.mimetype)
+    if COMPRESS_MIN_SIZE:
+        response.vary.add('Accept-Encoding')
+    if coding != 'identity':
+        response.headers['Content-Encoding'] = coding
+    return response
+
+# Server-side sessions: the cookie only carries an opaque id, attempts live in the store
+SESSION_COOKIE = 'vnr_sid'
+SESSION_TTL = int(os.environ.get('VNR_SESSION_TTL', 24 * 60 * 60))
+SESSION_MAX = int(os.environ.get('VNR_SESSION_MAX', 100_000))  # memory backend only; least recently used are evicted
+SESSION_BACKEND = os.environ.get('VNR_SESSION_BACKEND', 'memory')
+SESSIONS = create_session_store(SESSION_BACKEND, SESSION_TTL, SESSION_MAX)
+
+def current_session_id(create=False):
+    """Session id from the request cookie if it is still live, optionally starting a new session"""
+    session_id = request.cookies.get(SESSION_COOKIE)
+    if session_id and SESSIONS.exists(session_id):
+        return session_id
+    if not create:
+        return None
+    session_id = SESSIONS.create()
+    g.new_session_id = session_id
+    return session_id
+
+def count_attempts(amount=1):
+    """Add to the current session's attempt counter, starting a session if needed"""
+    if amount:
+        SESSIONS.incr_attempts(current_session_id(create=True), amount)
+
+# Rate limits as 'tokens per second:burst' (or 'off'), enforced before any matching work
+RATE_LIMIT_BACKEND = os.environ.get('VNR_RATE_LIMIT_BACKEND', 'memory')
+IP_LIMIT = parse_limit(os.environ.get('VNR_RATE_LIMIT_IP', '5:30'))
+SESSION_LIMIT = parse_limit(os.environ.get('VNR_RATE_LIMIT_SESSION', '2:15'))
+ATTEMPT_COST_STEP = int(os.environ.get('VNR_RATE_LIMIT_ATTEMPT_STEP', 50))  # 0 disables attempt-aware cost
+# Reverse proxies in front of the app that append to X-Forwarded-For (0: trust none)
+TRUST_PROXY = int(os.environ.get('VNR_TRUST_PROXY') or 0)
+IP_BUCKETS = create_buckets(RATE_LIMIT_BACKEND, *IP_LIMIT, table='ip_buckets') if IP_LIMIT else None
+SESSION_BUCKETS = create_buckets(RATE_LIMIT_BACKEND, *SESSION_LIMIT, table='session_buckets') if SESSION_LIMIT else None
+
+def rate_limit_delay(client_ip, session_id, messages=1):
+    """
+    Seconds the caller must wait before this request is allowed, or 0.0.
+    Each message costs one token; sessions pay one extra token per message for
+    every ATTEMPT_COST_STEP attempts they have already made, up to a full
+    bucket, so a busy session is slowed down but never locked out. More
+    messages than a bucket's burst can never be paid and return math.inf.
+    Tokens are only taken when every bucket allows the request.
+    """
+    for buckets, key in ((SESSION_BUCKETS, session_id), (IP_BUCKETS, client_ip)):
+        if buckets is not None and key and messages > buckets.burst:
+            return math.inf
+    session_cost = 0
+    if SESSION_BUCKETS is not None and session_id:
+        session_cost = messages
+        if ATTEMPT_COST_STEP:
+            session_cost += messages * (SESSIONS.attempts(session_id) // ATTEMPT_COST_STEP)
+        session_cost = min(session_cost, SESSION_BUCKETS.burst)
+    if session_cost:
+        delay = SESSION_BUCKETS.acquire(session_id, session_cost)
+        if delay:
+            return delay
+    if IP_BUCKETS is not None and client_ip:
+        delay = IP_BUCKETS.acquire(client_ip, messages)
+        if delay:
+            if session_cost:
+                SESSION_BUCKETS.refund(session_id, session_cost)
+            return delay
+    return 0.0
+
+def batch_max_size():
+    """Largest batch the rate limits could ever allow, capped at BATCH_MAX_SIZE"""
+    limits = [BATCH_MAX_SIZE] + [int(buckets.burst) for buckets in (IP_BUCKETS, SESSION_BUCKETS) if buckets is not None]
+    return min(limits)
+
+def forwarded_ip(forwarded, remote_addr):
+    """
+    Client address for rate limiting. Each of the TRUST_PROXY proxies appends
+    the address it saw, so the entry TRUST_PROXY from the right is the first
+    one no client can forge; the rest of the header is ignored. Like
+    Werkzeug's ProxyFix, a header with fewer entries falls back to the peer.
+    """
+    if TRUST_PROXY and forwarded:
+        entries = forwarded.split(',')
+        if len(entries) >= TRUST_PROXY:
+            return entries[-TRUST_PROXY].strip()
+    return remote_addr
+
+def client_ip():
+    return forwarded_ip(request.headers.get('X-Forwarded-For'), request.remote_addr)
+
+def rate_limited(messages=1):
+    """429 response if the caller is over its rate limit, else None"""
+    delay = rate_limit_delay(client_ip(), current_session_id(), messages)
+    if not delay:
+        return None
+    if delay == math.inf:
+        return jsonify({'error': 'Too many messages at once for your rate limit, please send fewer.'}), 413
+    METRICS.increment('rate_limited_total')
+    response = jsonify({'error': 'Too many requests, please slow down.'})
+    response.status_code = 429
+    response.headers['Retry-After'] = retry_after(delay)
+    return response
+
+@app.before_request
+def refresh_knowledge():
+    KNOWLEDGE.refresh()
+
+@app.after_request
+def set_session_cookie(response):
+    session_id = g.pop('new_session_id', None)
+    if session_id is not None:
+        response.set_cookie(SESSION_COOKIE, session_id, max_age=SESSION_TTL, httponly=True, samesite='Lax')
+    return response
+
+# The page is static, so it is revalidated against its ETag rather than re-sent
+INDEX_CACHE_CONTROL = os.environ.get('VNR_INDEX_CACHE_CONTROL', 'no-cache')
+
+@lru_cache(maxsize=None)
+def index_page():
+    """index.html rendered and precompressed once, on first use"""
+    with app.app_context():
+        body = render_template('index.html').encode('utf-8')
+    return StaticAsset(body, 'text/html; charset=utf-8', INDEX_CACHE_CONTROL)
+
+@app.route('/')
+def index():
+    # No session here: one is started by the first /chat attempt
+    page = index_page()
+    status, body, headers = page.select(request.headers.get('Accept-Encoding', ''), request.headers.get('If-None-Match'))
+    return app.response_class(body, status=status, headers=headers, content_type=page.content_type)
+
+@app.route('/chat', methods=['POST'])
+def chat():
+    user_message = request.json.get('message', '')
+    if not isinstance(user_message, str):
+        return jsonify({'error': 'message must be a string'}), 400
+    
+    if not user_message.strip():
+        return cached_json(EMPTY_RESPONSE)
+    
+    timing = METRICS.sample()
+    limited = rate_limited()
+    if limited:
+        return limited
+    
+    # Increment attempt counter
+    count_attempts()
+    if timing:
+        timing.lap('session')
+    
+    response = cached_json(process_message(user_message, timing))
+    if timing:
+        timing.lap('serialize')
+        timing.finish()
+    return response
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    user_message = request.json.get('message', '')
+    if not isinstance(user_message, str):
+        return jsonify({'error': 'message must be a string'}), 400
+    
+    timing = None
+    if not user_message.strip():
+        pieces = iter_paragraphs(EMPTY_RESPONSE.text)
+    else:
+        timing = METRICS.sample()
+        limited = rate_limited()
+        if limited:
+            return limited
+        # Increment attempt counter
+        count_attempts()
+        if timing:
+            timing.lap('session')
+        pieces = stream_message(user_message, timing)
+    
+    return app.response_class(encode_stream(pieces, timing), mimetype='application/x-ndjson')
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    messages = request.json.get('messages')
+    if not isinstance(messages, list):
+        return jsonify({'error': 'messages must be a list'}), 400
+    max_size = batch_max_size()
+    if len(messages) > max_size:
+        return jsonify({'error': f'At most {max_size} messages per batch.'}), 413
+    
+    limited = rate_limited(len(messages))
+    if limited:
+        return limited
+    
+    body, attempts = process_batch(messages)
+    count_attempts(attempts)
+    return app.response_class(body, mimetype=app.json.mimetype)
 
 @app.route('/stats')
 def stats():
     """Hidden endpoint showing attempt statistics"""
-    return jsonify({
-        'session_id': session.get('session_id', 'none'),
-        'attempts': session.get('attempts', 0),
+    return jsonify(stats_payload(current_session_id()))
+
+# /metrics names the injection rules, so it is off unless a scrape token is configured
+METRICS_TOKEN = os.environ.get('VNR_METRICS_TOKEN', '')
+
+def metrics_status(authorization):
+    """HTTP status for a /metrics request: 404 when disabled, 401 without the bearer token, else 200"""
+    if not METRICS_TOKEN:
+        return 404
+    scheme, _, token = (authorization or '').partition(' ')
+    if scheme.lower() != 'bearer' or not secrets.compare_digest(token.strip(), METRICS_TOKEN):
+        return 401
+    return 200
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for the /chat pipeline"""
+    status = metrics_status(request.headers.get('Authorization'))
+    if status == 404:
+        return jsonify({'error': 'Not found.'}), 404
+    if status == 401:
+        return jsonify({'error': 'Unauthorized.'}), 401, {'WWW-Authenticate': 'Bearer'}
+    return app.response_class(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+def render_metrics():
+    cache = RESPONSE_CACHE.stats()
+    decisions = DECISIONS.stats()
+    totals = SESSIONS.totals()
+    return METRICS.render([
+        ('response_cache_hits_total', 'counter', 'Answers served from the response cache.', cache['hits']),
+        ('response_cache_misses_total', 'counter', 'Answers rendered on a cache miss.', cache['misses']),
+        ('response_cache_entries', 'gauge', 'Answers currently cached.', cache['size']),
+        ('decision_memo_hits_total', 'counter', 'Messages decided from the decision memo.', decisions['hits']),
+        ('decision_memo_misses_total', 'counter', 'Messages that ran every check.', decisions['misses']),
+        ('decision_memo_entries', 'gauge', 'Decisions currently memoized.', decisions['size']),
+        ('decision_memo_max_entries', 'gauge', 'Decision memo size limit.', decisions['maxsize']),
+        ('knowledge_reloads_total', 'counter', 'Knowledge base hot reloads.', KNOWLEDGE.reloads),
+        ('sessions_active', 'gauge', 'Live sessions in the session store.', totals['active_sessions']),
+        ('attempts_total', 'counter', 'Chat attempts across all sessions.', totals['total_attempts']),
+    ])
+
+def stats_payload(session_id):
+    return {
+        'session_id': session_id or 'none',
+        'attempts': SESSIONS.attempts(session_id) if session_id else 0,
+        'all_sessions': SESSIONS.totals(),
+        'response_cache': RESPONSE_CACHE.stats(),
+        'decision_cache': DECISIONS.stats(),
         'hint': 'Keep trying different questions about VNR... or maybe something more specific? 🤔'
-    })
+    }
+
+def warm_up():
+    """
+    Build everything the first request would otherwise pay for: the injection
+    scanner, the fuzzy and intent indexes, the search index, the precompressed
+    index page and the default answer of every intent. Startup stays lazy
+    unless this is called, which suits serverless cold starts; long-running
+    servers call it once up front.
+    """
+    scanner.warm_up()
+    SECRET_INDEX.build()
+    INTENT_ROUTER.compile()
+    search_index()
+    index_page()
+    RESPONSE_CACHE.get((None, ()))
+    for intent, _, _, _ in INTENT_ROUTES:
+        RESPONSE_CACHE.get((intent, ()))
+
+if os.environ.get('VNR_WARMUP') == '1':
+    warm_up()
 
 if __name__ == '__main__':
+    warm_up()
     print("=" * 70)
     print("VNR BOT CTF Challenge - AI-Powered Edition")
     print("=" * 70)
@@ -0,0 +1,320 @@
+"""
+ASGI entry point serving /, /chat, /chat/stream, /chat/batch, /stats and /metrics
+with async handlers.
+
+    uvicorn asgi:application --workers 2
+
+The message pipeline (secret check, injection scan, response lookup) is CPU
+bound, so it runs on a bounded thread pool instead of the event loop. Once
+VNR_CHAT_MAX_PENDING /chat requests are queued or running, new ones are
+rejected straight away with 503 + Retry-After rather than piling up.
+Sessions use the same server-side store and cookie as the Flask app. With a
+SQLite session or rate-limit backend, store calls run on a small pool of
+their own so a busy database never stalls the event loop.
+"""
+import asyncio
+import contextlib
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+
+import app as chatbot
+from ratelimit import retry_after
+
+CHAT_WORKERS = int(os.environ.get('VNR_CHAT_WORKERS', os.cpu_count() or 2))
+CHAT_MAX_PENDING = int(os.environ.get('VNR_CHAT_MAX_PENDING', 64))
+MAX_BODY_SIZE = 64 * 1024
+
+EXECUTOR = ThreadPoolExecutor(max_workers=CHAT_WORKERS, thread_name_prefix='chat')
+
+# Memory stores answer in microseconds and are called inline; anything else does I/O
+STORE_WORKERS = int(os.environ.get('VNR_STORE_WORKERS', 4))
+STORE_EXECUTOR = None
+if chatbot.SESSION_BACKEND != 'memory' or chatbot.RATE_LIMIT_BACKEND != 'memory':
+    STORE_EXECUTOR = ThreadPoolExecutor(max_workers=STORE_WORKERS, thread_name_prefix='store')
+
+# A long-running server: pay for the lazily built indexes and the precompressed
+# index page at startup, not on the first request
+chatbot.warm_up()
+
+JSON_TYPE = chatbot.app.json.mimetype.encode('latin-1')
+
+# /chat requests currently queued or running; only touched from the event loop
+pending = 0
+
+def current_session_id(headers):
+    """Live session id from the request cookie, or None"""
+    cookie = SimpleCookie()
+    try:
+        cookie.load(headers.get(b'cookie', b'').decode('latin-1'))
+    except Exception:
+        return None
+    morsel = cookie.get(chatbot.SESSION_COOKIE)
+    if morsel is None or not chatbot.SESSIONS.exists(morsel.value):
+        return None
+    return morsel.value
+
+def ensure_session(headers, response_headers):
+    """Live session id, starting a new session (and adding its cookie) if needed"""
+    session_id = current_session_id(headers)
+    if session_id is None:
+        session_id = chatbot.SESSIONS.create()
+        cookie = (f'{chatbot.SESSION_COOKIE}={session_id}; Max-Age={chatbot.SESSION_TTL}; '
+                  'HttpOnly; Path=/; SameSite=Lax')
+        response_headers.append((b'set-cookie', cookie.encode('latin-1')))
+    return session_id
+
+async def store_call(function, *args):
+    """function(*args) for calls that reach the session or rate-limit stores"""
+    if STORE_EXECUTOR is None:
+        return function(*args)
+    return await asyncio.get_running_loop().run_in_executor(STORE_EXECUTOR, function, *args)
+
+def count_attempts(headers, response_headers, amount=1):
+    """Add to the session's attempt counter, starting a session (and adding its cookie) if needed"""
+    chatbot.SESSIONS.incr_attempts(ensure_session(headers, response_headers), amount)
+
+def client_ip(scope, headers):
+    forwarded = headers.get(b'x-forwarded-for')
+    client = scope.get('client')
+    return chatbot.forwarded_ip(forwarded.decode('latin-1') if forwarded else None, client[0] if client else None)
+
+def limit_delay(scope, headers, messages):
+    return chatbot.rate_limit_delay(client_ip(scope, headers), current_session_id(headers), messages)
+
+async def reject_if_limited(scope, send, headers, messages=1):
+    """Send a 429 (413 if the request could never fit) and return True if the caller is over its rate limit"""
+    delay = await store_call(limit_delay, scope, headers, messages)
+    if not delay:
+        return False
+    if delay == math.inf:
+        await send_response(send, 413, json_body({'error': 'Too many messages at once for your rate limit, please send fewer.'}))
+        return True
+    chatbot.METRICS.increment('rate_limited_total')
+    await send_response(send, 429, json_body({'error': 'Too many requests, please slow down.'}),
+                        headers=[(b'retry-after', retry_after(delay).encode('latin-1'))])
+    return True
+
+async def read_body(receive):
+    """Request body, or None if it exceeds MAX_BODY_SIZE"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_SIZE:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+async def send_response(send, status, body, content_type=JSON_TYPE, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type),
+            (b'content-length', str(len(body)).encode('latin-1')),
+            *headers,
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+def without_body(send):
+    """send for a HEAD request: the GET response's status and headers, no body"""
+    async def send_head(message):
+        if message['type'] == 'http.response.body':
+            message = {**message, 'body': b''}
+        await send(message)
+    return send_head
+
+def json_body(payload):
+    return (chatbot.app.json.dumps(payload, separators=(',', ':')) + '\n').encode('utf-8')
+
+def encode_headers(pairs):
+    return [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in pairs]
+
+async def index(scope, receive, send, headers):
+    # No session here: one is started by the first /chat attempt
+    extra = []
+    page = chatbot.index_page()
+    status, body, page_headers = page.select(
+        headers.get(b'accept-encoding', b'').decode('latin-1'),
+        headers.get(b'if-none-match', b'').decode('latin-1'),
+    )
+    extra.extend(encode_headers(page_headers))
+    if status == 304:
+        await send({'type': 'http.response.start', 'status': 304, 'headers': extra})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    await send_response(send, 200, body, page.content_type.encode('latin-1'), extra)
+
+class Rejected(Exception):
+    """Raised by request checks; application() answers with its status and JSON error"""
+
+    def __init__(self, status, error, headers=()):
+        super().__init__(error)
+        self.status = status
+        self.error = error
+        self.headers = list(headers)
+
+@contextlib.asynccontextmanager
+async def admit():
+    """Count a chat request as pending while it runs; sheds it with 503 once CHAT_MAX_PENDING are in"""
+    global pending
+    if pending >= CHAT_MAX_PENDING:
+        raise Rejected(503, 'Server busy, please retry.', [(b'retry-after', b'1')])
+    pending += 1
+    try:
+        yield
+    finally:
+        pending -= 1
+
+async def read_json(receive, field, kind, default, error):
+    """field of the JSON request body, or Rejected (413/400) if the body is too large, invalid or not a kind"""
+    body = await read_body(receive)
+    if body is None:
+        raise Rejected(413, 'Request body too large.')
+    try:
+        value = json.loads(body).get(field, default)
+    except (ValueError, AttributeError):
+        raise Rejected(400, 'Invalid JSON body.') from None
+    if not isinstance(value, kind):
+        raise Rejected(400, error)
+    return value
+
+async def chat(scope, receive, send, headers):
+    async with admit():
+        user_message = await read_json(receive, 'message', str, '', 'message must be a string')
+        if not user_message.strip():
+            await send_response(send, 200, chatbot.encode_body(chatbot.EMPTY_RESPONSE))
+            return
+        timing = chatbot.METRICS.sample()
+        if await reject_if_limited(scope, send, headers):
+            return
+
+        # Increment attempt counter
+        extra = []
+        await store_call(count_attempts, headers, extra)
+        if timing:
+            timing.lap('session')
+
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(EXECUTOR, chatbot.process_message, user_message, timing)
+        coding, body = chatbot.negotiate_body(entry, headers.get(b'accept-encoding', b'').decode('latin-1'))
+        if chatbot.COMPRESS_MIN_SIZE:
+            extra.append((b'vary', b'accept-encoding'))
+        if coding != 'identity':
+            extra.append((b'content-encoding', coding.encode('latin-1')))
+        if timing:
+            timing.lap('serialize')
+            timing.finish()
+        await send_response(send, 200, body, headers=extra)
+
+async def chat_stream(scope, receive, send, headers):
+    async with admit():
+        user_message = await read_json(receive, 'message', str, '', 'message must be a string')
+        response_headers = [(b'content-type', b'application/x-ndjson')]
+        timing = None
+        if not user_message.strip():
+            pieces = chatbot.iter_paragraphs(chatbot.EMPTY_RESPONSE.text)
+        else:
+            timing = chatbot.METRICS.sample()
+            if await reject_if_limited(scope, send, headers):
+                return
+            # Increment attempt counter
+            await store_call(count_attempts, headers, response_headers)
+            if timing:
+                timing.lap('session')
+
+            loop = asyncio.get_running_loop()
+            pieces = await loop.run_in_executor(EXECUTOR, chatbot.stream_message, user_message, timing)
+
+        await send({'type': 'http.response.start', 'status': 200, 'headers': response_headers})
+        for chunk in chatbot.encode_stream(pieces, timing):
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+async def chat_batch(scope, receive, send, headers):
+    async with admit():
+        messages = await read_json(receive, 'messages', list, None, 'messages must be a list')
+        max_size = chatbot.batch_max_size()
+        if len(messages) > max_size:
+            raise Rejected(413, f'At most {max_size} messages per batch.')
+        if await reject_if_limited(scope, send, headers, len(messages)):
+            return
+
+        loop = asyncio.get_running_loop()
+        result, attempts = await loop.run_in_executor(EXECUTOR, chatbot.process_batch, messages)
+        extra = []
+        if attempts:
+            await store_call(count_attempts, headers, extra, attempts)
+        await send_response(send, 200, result, headers=extra)
+
+async def metrics(scope, receive, send, headers):
+    status = chatbot.metrics_status(headers.get(b'authorization', b'').decode('latin-1'))
+    if status == 404:
+        await send_response(send, 404, json_body({'error': 'Not found.'}))
+        return
+    if status == 401:
+        await send_response(send, 401, json_body({'error': 'Unauthorized.'}), headers=[(b'www-authenticate', b'Bearer')])
+        return
+    body = await store_call(chatbot.render_metrics)
+    await send_response(send, 200, body.encode('utf-8'), b'text/plain; version=0.0.4')
+
+def session_stats(headers):
+    return chatbot.stats_payload(current_session_id(headers))
+
+async def stats(scope, receive, send, headers):
+    payload = await store_call(session_stats, headers)
+    await send_response(send, 200, json_body(payload))
+
+ROUTES = {
+    '/': ('GET', index),
+    '/chat': ('POST', chat),
+    '/chat/stream': ('POST', chat_stream),
+    '/chat/batch': ('POST', chat_batch),
+    '/stats': ('GET', stats),
+    '/metrics': ('GET', metrics),
+}
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            EXECUTOR.shutdown(wait=False)
+            if STORE_EXECUTOR is not None:
+                STORE_EXECUTOR.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    route = ROUTES.get(scope['path'])
+    if route is None:
+        await send_response(send, 404, json_body({'error': 'Not found.'}))
+        return
+    method, handler = route
+    if scope['method'] == 'HEAD' and method == 'GET':
+        send = without_body(send)
+    elif scope['method'] != method:
+        allow = 'GET, HEAD' if method == 'GET' else method
+        await send_response(send, 405, json_body({'error': 'Method not allowed.'}),
+                            headers=[(b'allow', allow.encode('latin-1'))])
+        return
+
+    chatbot.KNOWLEDGE.refresh()
+    try:
+        await handler(scope, receive, send, dict(scope['headers']))
+    except Rejected as rejected:
+        await send_response(send, rejected.status, json_body({'error': rejected.error}), headers=rejected.headers)
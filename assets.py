@@ -0,0 +1,104 @@
+"""
+Precompressed static responses and Accept-Encoding negotiation.
+
+A StaticAsset is rendered once and stored as identity, gzip and (when the
+optional `brotli` package is installed) br variants, each with its own strong
+ETag. Serving one is a dict lookup plus header parsing; nothing is compressed
+per request.
+"""
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred content codings, best first; br is only offered when brotli is importable
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Levels for bodies compressed while serving a request rather than ahead of time
+DYNAMIC_LEVELS = {'br': 5, 'gzip': 6}
+
+def compress(body, encoding, level=None):
+    """body compressed with encoding ('br' or 'gzip'); level defaults to the maximum"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if level is None else level)
+    if encoding == 'gzip':
+        # mtime=0 keeps the output, and so the ETag, identical across restarts
+        return gzip.compress(body, compresslevel=9 if level is None else level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding!r}")
+
+def accepted_encodings(header):
+    """Content codings the client accepts (q > 0), from an Accept-Encoding header value"""
+    accepted = set()
+    refused = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        (accepted if quality > 0 else refused).add(coding)
+    if '*' in accepted:
+        accepted.update(coding for coding in ENCODINGS if coding not in refused)
+    return accepted
+
+def choose_encoding(header, available):
+    """Best of the available codings the client accepts, or 'identity'"""
+    if not header:
+        return 'identity'
+    accepted = accepted_encodings(header)
+    for coding in ENCODINGS:
+        if coding in available and coding in accepted:
+            return coding
+    return 'identity'
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match check; it uses weak comparison, so W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+class StaticAsset:
+    """
+    A response body rendered once, with a precompressed variant per coding.
+    Compressed variants that don't come out smaller than the original are dropped.
+    """
+
+    def __init__(self, body, content_type, cache_control='no-cache'):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.variants = {'identity': body}
+        for coding in ENCODINGS:
+            compressed = compress(body, coding)
+            if len(compressed) < len(body):
+                self.variants[coding] = compressed
+        self.etags = {
+            coding: '"' + hashlib.blake2b(variant, digest_size=12).hexdigest() + '"'
+            for coding, variant in self.variants.items()
+        }
+
+    def select(self, accept_encoding, if_none_match):
+        """
+        (status, body, headers) for a GET with the given request headers:
+        200 with the negotiated variant, or 304 with an empty body when the
+        client's cached copy is still current.
+        """
+        coding = choose_encoding(accept_encoding, self.variants)
+        etag = self.etags[coding]
+        headers = [('ETag', etag), ('Cache-Control', self.cache_control), ('Vary', 'Accept-Encoding')]
+        if etag_matches(if_none_match, etag):
+            return 304, b'', headers
+        if coding != 'identity':
+            headers.append(('Content-Encoding', coding))
+        return 200, self.variants[coding], headers
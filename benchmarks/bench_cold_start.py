@@ -0,0 +1,67 @@
+"""
+Cold-start cost of the serverless entry point.
+
+Each round starts a fresh interpreter, imports app (as the serverless runtime
+does), splitting Flask's own import from the app's, then times the first and second /chat requests through the Flask test
+client: one answered by a keyword intent and one that falls back to search.
+Rounds run with lazy startup (the default) and with VNR_WARMUP=1, which builds
+everything at import time instead.
+
+    python benchmarks/bench_cold_start.py [--rounds 15]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from load_test import ROOT, server_env
+
+PROBE = r"""
+import json, time
+start = time.perf_counter()
+import flask
+framework = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+timings = {'import_flask_ms': (framework - start) * 1000, 'import_app_ms': (imported - framework) * 1000}
+for name, message in (('first_keyword_ms', 'What are the fees for CSE?'),
+                      ('first_search_ms', 'is there an ncc unit'),
+                      ('second_keyword_ms', 'tell me about placements')):
+    began = time.perf_counter()
+    assert client.post('/chat', json={'message': message}).status_code == 200
+    timings[name] = (time.perf_counter() - began) * 1000
+timings['total_ms'] = (time.perf_counter() - start) * 1000
+print(json.dumps(timings))
+"""
+
+MODES = {
+    'lazy': {},
+    'warm-at-import': {'VNR_WARMUP': '1'},
+}
+
+def probe(extra_env):
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=ROOT, env=dict(server_env(), **extra_env),
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=15)
+    args = parser.parse_args()
+
+    probe({})  # let the first run compile the knowledge blob and bytecode
+    for mode, extra_env in MODES.items():
+        runs = [probe(extra_env) for _ in range(args.rounds)]
+        result = {'mode': mode, 'rounds': args.rounds}
+        # Minimum as well as median: on a busy machine the median of a cold start is mostly noise
+        for key in runs[0]:
+            result[key] = round(statistics.median(run[key] for run in runs), 2)
+            result[key.replace('_ms', '_min_ms')] = round(min(run[key] for run in runs), 2)
+        print(json.dumps(result))
+
+if __name__ == '__main__':
+    main()
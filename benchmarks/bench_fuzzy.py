@@ -0,0 +1,101 @@
+"""
+Timing for the fuzzy secret-pattern index.
+
+Runs the original word x variation SequenceMatcher loop and the indexed
+check_secret_pattern over a generated corpus and prints how long each took.
+The equivalence check on the same corpus generator is tests/test_fuzzy.py.
+
+    python benchmarks/bench_fuzzy.py [corpus_size]
+"""
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app  # noqa: E402
+
+def reference_check_secret_pattern(text):
+    """check_secret_pattern as it was before the index, kept as the oracle"""
+    text_lower = text.lower()
+    text_clean = re.sub(r'[^a-z0-9\s]', '', text_lower)
+    matches = {key: False for key in app.SECRET_COMPONENTS}
+    for component, variations in app.SECRET_COMPONENTS.items():
+        for variation in variations:
+            if variation in text_clean or variation in text_lower:
+                matches[component] = True
+                break
+        if not matches[component]:
+            for word in text_clean.split():
+                for variation in variations:
+                    if app.similarity(word, variation) > app.FUZZY_THRESHOLD:
+                        matches[component] = True
+                        break
+                if matches[component]:
+                    break
+    return all(matches.values())
+
+FILLER = ("what is the fee for cse hostel placement about campus library dean "
+          "approval code process seats admission vnr college please tell me").split()
+
+def mutate(word, rng):
+    """Apply a random typo: insert, delete, substitute or transpose"""
+    if not word:
+        return word
+    i = rng.randrange(len(word))
+    op = rng.randrange(4)
+    if op == 0:
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if op == 1:
+        return word[:i] + word[i + 1:]
+    if op == 2:
+        return word[:i] + rng.choice(string.ascii_lowercase + string.digits) + word[i + 1:]
+    return word[:i] + word[i + 1:i + 2] + word[i:i + 1] + word[i + 2:]
+
+def generate_corpus(size, seed=7749):
+    rng = random.Random(seed)
+    vocabulary = [v.strip() for variations in app.SECRET_COMPONENTS.values() for v in variations]
+    corpus = []
+    for _ in range(size):
+        words = []
+        for _ in range(rng.randint(1, 30)):
+            roll = rng.random()
+            if roll < 0.3:
+                word = rng.choice(vocabulary)
+            elif roll < 0.6:
+                word = rng.choice(FILLER)
+            else:
+                word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(1, 12)))
+            for _ in range(rng.choice([0, 0, 1, 1, 2])):
+                word = mutate(word, rng)
+            if rng.random() < 0.1:
+                word = word.upper()
+            if rng.random() < 0.1:
+                word += rng.choice("?!.,'")
+            words.append(word)
+        corpus.append(' '.join(words))
+    return corpus
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    corpus = generate_corpus(size)
+
+    start = time.perf_counter()
+    expected = [reference_check_secret_pattern(text) for text in corpus]
+    reference_time = time.perf_counter() - start
+
+    app.SECRET_INDEX.lookup.cache_clear()
+    start = time.perf_counter()
+    actual = [app.check_secret_pattern(text) for text in corpus]
+    indexed_time = time.perf_counter() - start
+
+    disagreements = sum(want != got for want, got in zip(expected, actual))
+    print(f"{size} messages, {sum(expected)} positives, {disagreements} disagreements")
+    print(f"reference: {reference_time * 1000:.1f} ms")
+    print(f"indexed:   {indexed_time * 1000:.1f} ms ({reference_time / indexed_time:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Per-call overhead of the token-bucket rate limiter with many distinct keys.
+
+Cycles through thousands of distinct client keys (as a scripted attacker
+rotating IPs or session ids would) and prints p50/p99 per acquire() call for
+the in-memory buckets and, for comparison, the SQLite-shared buckets.
+
+    python benchmarks/bench_ratelimit.py [--keys 1000 10000 100000] [--calls 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ratelimit import MemoryBuckets, SQLiteBuckets  # noqa: E402
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def measure(buckets, keys, calls):
+    rng = random.Random(11)
+    sequence = [rng.choice(keys) for _ in range(calls)]
+    clock = time.perf_counter_ns
+    samples = []
+    for key in sequence:
+        start = clock()
+        buckets.acquire(key)
+        samples.append(clock() - start)
+    return percentile(samples, 0.50) / 1000, percentile(samples, 0.99) / 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keys', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"{'backend':>8} {'keys':>8} {'p50 us':>8} {'p99 us':>8}")
+    for count in args.keys:
+        keys = [f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}" for n in range(count)]
+        p50, p99 = measure(MemoryBuckets(rate=5, burst=30), keys, args.calls)
+        print(f"{'memory':>8} {count:>8} {p50:>8.2f} {p99:>8.2f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        keys = [f"session{n}" for n in range(args.keys[0])]
+        buckets = SQLiteBuckets(os.path.join(directory, 'limits.db'), rate=5, burst=30)
+        p50, p99 = measure(buckets, keys, min(args.calls, 20000))
+        print(f"{'sqlite':>8} {len(keys):>8} {p50:>8.2f} {p99:>8.2f}")
+
+if __name__ == '__main__':
+    main()
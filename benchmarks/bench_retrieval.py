@@ -0,0 +1,72 @@
+"""
+Query latency of the BM25 section index as the corpus grows.
+
+Builds synthetic corpora from the real knowledge base vocabulary plus random
+filler terms, runs a fixed query mix against each, and prints p50/p99
+latency. Exits non-zero if any p99 reaches the 1 ms budget.
+
+    python benchmarks/bench_retrieval.py [sizes...]
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app  # noqa: E402
+from retrieval import BM25Index, tokenize  # noqa: E402
+
+BUDGET_US = 1000
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def knowledge_vocabulary():
+    snapshot = app.KNOWLEDGE.snapshot()
+    words = set()
+    for section, value in snapshot.items():
+        texts = [value] if isinstance(value, str) else value.values()
+        for text in texts:
+            words.update(tokenize(text))
+    return sorted(words)
+
+def synthetic_corpus(size, vocabulary, rng):
+    filler = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(size)]
+    documents = []
+    for number in range(size):
+        words = [rng.choice(vocabulary if rng.random() < 0.6 else filler) for _ in range(rng.randint(10, 40))]
+        documents.append(((f"section{number // 10}", f"key{number}"), ' '.join(words)))
+    return documents
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000, 10000]
+    rng = random.Random(44)
+    vocabulary = knowledge_vocabulary()
+    queries = [' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))) for _ in range(2000)]
+
+    over_budget = False
+    print(f"{'sections':>9} {'build ms':>9} {'p50 us':>8} {'p99 us':>8}")
+    for size in sizes:
+        start = time.perf_counter()
+        index = BM25Index(synthetic_corpus(size, vocabulary, rng))
+        build_ms = (time.perf_counter() - start) * 1000
+
+        samples = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, k=app.SEARCH_TOP_K)
+            samples.append((time.perf_counter() - start) * 1e6)
+
+        p50, p99 = percentile(samples, 0.50), percentile(samples, 0.99)
+        over_budget = over_budget or p99 >= BUDGET_US
+        print(f"{size:>9} {build_ms:>9.1f} {p50:>8.1f} {p99:>8.1f}")
+
+    if over_budget:
+        print(f"p99 exceeded the {BUDGET_US} us budget")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Timing for generate_smart_response, and the tool that pins its golden answers.
+
+Builds a deterministic query corpus from the routing keywords plus filler and
+prints the per-query cost. tests/test_router.py checks every answer against
+the hashes pinned in golden_responses.json.
+
+    python benchmarks/bench_router.py            # time the corpus
+    python benchmarks/bench_router.py --update   # re-pin today's answers
+"""
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+import app  # noqa: E402
+
+GOLDEN_PATH = os.path.join(HERE, 'golden_responses.json')
+
+KEYWORDS = [
+    'hello', 'hi', 'hey', 'namaste', 'good morning', 'good afternoon',
+    'about', 'tell me about', 'what is vnr', 'describe',
+    'course', 'branch', 'department', 'stream', 'cse', 'ece', 'eee', 'mechanical', 'civil', 'program', 'degree',
+    'computer science', 'electronics', 'electrical', 'mech', 'it', 'information technology', 'aiml', 'ai',
+    'machine learning',
+    'admission', 'eligibility', 'eligible', 'entrance', 'exam', 'eamcet', 'jee', 'join', 'apply', 'seat', 'fee',
+    'cost', 'tuition', 'intake', 'process', 'procedure', 'how to', 'how to get',
+    'placement', 'job', 'company', 'package', 'salary', 'recruit', 'hire', 'career',
+    'infrastructure', 'facility', 'campus', 'lab', 'library', 'book', 'hostel', 'accommodation', 'transport',
+    'bus', 'sports', 'sport', 'ground',
+    'faculty', 'professor', 'teacher', 'staff', 'hod',
+    'location', 'address', 'where', 'reach', 'contact', 'phone', 'email',
+    'activity', 'club', 'event', 'fest', 'cultural', 'technical', 'competition',
+    'achievement', 'ranking', 'nirf', 'accreditation', 'award', 'recognition',
+]
+FILLER = ['what', 'is', 'the', 'of', 'vnr', 'college', 'please', 'for', 'my', 'son', 'details', 'okay',
+          'thanks', 'which', 'year', 'good', 'best', 'quick', 'question']
+
+def generate_corpus(size=3000, seed=1995):
+    rng = random.Random(seed)
+    corpus = list(KEYWORDS) + [word.upper() for word in KEYWORDS] + FILLER
+    while len(corpus) < size:
+        words = [rng.choice(KEYWORDS if rng.random() < 0.4 else FILLER) for _ in range(rng.randint(1, 8))]
+        query = ' '.join(words)
+        if rng.random() < 0.2:
+            query = query.title()
+        corpus.append(query)
+    return corpus
+
+def digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def main():
+    corpus = generate_corpus()
+
+    if '--update' in sys.argv:
+        golden = {query: digest(app.generate_smart_response(query)) for query in corpus}
+        with open(GOLDEN_PATH, 'w', encoding='utf-8') as f:
+            json.dump(golden, f, indent=0, sort_keys=True)
+        print(f"pinned {len(golden)} answers to {GOLDEN_PATH}")
+        return
+
+    rounds = 20
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in corpus:
+            app.generate_smart_response(query)
+    elapsed = time.perf_counter() - start
+    print(f"generate_smart_response: {elapsed / (rounds * len(corpus)) * 1e6:.2f} us/query")
+
+if __name__ == '__main__':
+    main()
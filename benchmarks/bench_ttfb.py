@@ -0,0 +1,68 @@
+"""
+Time-to-first-byte of /chat versus the streaming /chat/stream endpoint.
+
+Starts the Flask server as a subprocess and, for the longest answers, measures
+how long each endpoint takes to deliver the first body byte and the full body.
+
+    python benchmarks/bench_ttfb.py [--mode wsgi|asgi] [--rounds 200]
+"""
+import argparse
+import http.client
+import json
+import subprocess
+import sys
+import time
+
+from load_test import ROOT, SERVERS, free_port, percentile, server_env, wait_until_up
+
+MESSAGES = [
+    'list every course',
+    'infrastructure',
+    'faculty',
+    'placements',
+]
+
+def measure(conn, path, message):
+    body = json.dumps({'message': message})
+    start = time.perf_counter()
+    conn.request('POST', path, body, {'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    response.read(1)
+    first_byte = time.perf_counter() - start
+    response.read()
+    return first_byte, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=sorted(SERVERS), default='wsgi')
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    port = free_port()
+    command = [part.replace('{port}', str(port)) for part in SERVERS[args.mode]]
+    server = subprocess.Popen(command, cwd=ROOT, env=server_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        for path in ('/chat', '/chat/stream'):
+            for message in MESSAGES:
+                first, total = [], []
+                for _ in range(args.rounds):
+                    ttfb, full = measure(conn, path, message)
+                    first.append(ttfb)
+                    total.append(full)
+                print(json.dumps({
+                    'mode': args.mode,
+                    'path': path,
+                    'message': message,
+                    'ttfb_p50_ms': round(percentile(first, 0.50) * 1000, 3),
+                    'ttfb_p99_ms': round(percentile(first, 0.99) * 1000, 3),
+                    'total_p50_ms': round(percentile(total, 0.50) * 1000, 3),
+                }))
+        conn.close()
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == '__main__':
+    sys.exit(main())
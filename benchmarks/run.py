@@ -0,0 +1,232 @@
+"""
+Benchmark suite for every /chat pipeline stage, checked against a stored baseline.
+
+Microbenchmarks similarity, check_secret_pattern, is_prompt_injection and
+generate_smart_response on short, long and adversarial inputs (including the
+inputs that make the injection rules backtrack), then load-tests /chat end to
+end through the Flask test client and a real threaded server.
+
+Results are written to benchmarks/results.json and compared with
+benchmarks/baseline.json. A benchmark regresses when it is more than its
+tolerance times slower than the baseline (for throughput: that many times
+lower); the exit status is 1 if anything regressed.
+
+    python benchmarks/run.py [--quick] [--skip-server] [--only PREFIX]
+    python benchmarks/run.py --update-baseline    # re-pin after an intended change
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(HERE, 'results.json')
+BASELINE_PATH = os.path.join(HERE, 'baseline.json')
+DEFAULT_TOLERANCE = 2.5
+
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+# The test client sends every request from one address, so rate limits are off
+# (same as the real-server load test); the settings are read at import time.
+os.environ.setdefault('VNR_RATE_LIMIT_IP', 'off')
+os.environ.setdefault('VNR_RATE_LIMIT_SESSION', 'off')
+
+import app as chatbot  # noqa: E402
+import load_test  # noqa: E402
+
+LONG_TEXT = ("I am a student from Hyderabad and I would like to know more about the college, "
+             "its courses, the fee structure for each branch, hostel facilities, transport, "
+             "placements and the clubs students can join during their four years. ") * 14
+
+# name -> message, for the stages that take a single message
+INPUTS = {
+    'short': 'fees for cse',
+    'long': LONG_TEXT[:3500],
+    # Unclosed special-token markers: every '<|' starts a lazy scan to the end of the text
+    'adv_special_tokens': '<|' * 2000,
+    # 'translate' followed by no flag/secret: '.+' backtracks from every occurrence
+    'adv_translate': 'translate ' * 400,
+    # Past the old 4,096-char scan cap; scanned like any other message now
+    'adv_oversized': 'a' * 5000,
+    # Every word is a near miss for a secret component, so each one reaches the fuzzy index
+    'adv_near_miss': 'deen aproval cod 7748 dean aproval kode 7479 ' * 20,
+}
+
+# name -> (a, b) for similarity()
+SIMILARITY_INPUTS = {
+    'short': ('aproval', 'approval'),
+    'long': (LONG_TEXT[:500], LONG_TEXT[7:507]),
+    'adversarial': ('ab' * 1000, 'ba' * 1000),
+}
+
+E2E_MESSAGES = load_test.MESSAGES
+
+def per_call(function, quick=False):
+    """Median seconds per call over several timeit rounds"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    rounds = timer.repeat(repeat=3 if quick else 7, number=number)
+    return statistics.median(rounds) / number
+
+def micro_benchmarks(quick=False):
+    results = {}
+    for name, (a, b) in SIMILARITY_INPUTS.items():
+        results[f'micro.similarity.{name}'] = per_call(lambda: chatbot.similarity(a, b), quick)
+
+    stages = {
+        'check_secret_pattern': chatbot.check_secret_pattern,
+        'is_prompt_injection': chatbot.is_prompt_injection,
+        'generate_smart_response': chatbot.generate_smart_response,
+    }
+    for stage, function in stages.items():
+        for name, message in INPUTS.items():
+            results[f'micro.{stage}.{name}'] = per_call(lambda: function(message), quick)
+
+    # Cache misses: the answer has to be resolved and rendered every time
+    def render_uncached(message=INPUTS['long']):
+        chatbot.RESPONSE_CACHE.invalidate()
+        return chatbot.generate_smart_response(message)
+    results['micro.generate_smart_response.uncached'] = per_call(render_uncached, quick)
+
+    # The whole pipeline for a repeated message, answered from the decision memo
+    for name, message in INPUTS.items():
+        results[f'micro.process_message.repeat_{name}'] = per_call(lambda: chatbot.process_message(message), quick)
+
+    return {name: {'value': round(seconds * 1e6, 3), 'unit': 'us'} for name, seconds in results.items()}
+
+def test_client_benchmark(requests=2000):
+    """Sequential POST /chat through the Flask test client: the full request path minus sockets"""
+    client = chatbot.app.test_client()
+    latencies = []
+    for index in range(requests):
+        message = E2E_MESSAGES[index % len(E2E_MESSAGES)]
+        start = time.perf_counter()
+        response = client.post('/chat', json={'message': message})
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"/chat returned {response.status_code} for {message!r}")
+
+    # The precompressed index page, as a browser requests it
+    page_latencies = []
+    for _ in range(requests // 4):
+        start = time.perf_counter()
+        client.get('/', headers={'Accept-Encoding': 'gzip, deflate, br'})
+        page_latencies.append(time.perf_counter() - start)
+    return {
+        'e2e.test_client.p50': {'value': round(load_test.percentile(latencies, 0.50) * 1e6, 1), 'unit': 'us'},
+        'e2e.test_client.p99': {'value': round(load_test.percentile(latencies, 0.99) * 1e6, 1), 'unit': 'us'},
+        'e2e.test_client.index_p50': {'value': round(load_test.percentile(page_latencies, 0.50) * 1e6, 1), 'unit': 'us'},
+    }
+
+def server_benchmark(clients=16, requests=100):
+    """Concurrent keep-alive clients against the threaded Flask server in a subprocess"""
+    result = load_test.run('wsgi', clients, requests)
+    if result['errors']:
+        raise RuntimeError(f"server load test had {result['errors']} failed requests")
+    return {
+        'e2e.server.throughput': {'value': result['throughput_rps'], 'unit': 'req/s', 'higher_is_better': True},
+        'e2e.server.p50': {'value': round(result['p50_ms'] * 1000, 1), 'unit': 'us'},
+        'e2e.server.p99': {'value': round(result['p99_ms'] * 1000, 1), 'unit': 'us'},
+    }
+
+def compare(results, baseline):
+    """Rows of (name, value, baseline value, ratio, tolerance, regressed); ratio > 1 is worse"""
+    default = baseline.get('tolerance', DEFAULT_TOLERANCE)
+    rows = []
+    for name, result in sorted(results.items()):
+        expected = baseline.get('benchmarks', {}).get(name)
+        if expected is None:
+            rows.append((name, result, None, None, None, False))
+            continue
+        tolerance = expected.get('tolerance', default)
+        value, reference = result['value'], expected['value']
+        if result.get('higher_is_better'):
+            ratio = reference / value if value else float('inf')
+        else:
+            ratio = value / reference if reference else float('inf')
+        rows.append((name, result, reference, ratio, tolerance, ratio > tolerance))
+    return rows
+
+def print_report(rows):
+    print(f"{'benchmark':<48} {'value':>12} {'baseline':>12} {'ratio':>7}")
+    for name, result, reference, ratio, tolerance, regressed in rows:
+        unit = result['unit']
+        value = f"{result['value']:g} {unit}"
+        if reference is None:
+            print(f"{name:<48} {value:>12} {'(new)':>12}")
+            continue
+        flag = f'  REGRESSED (> {tolerance:g}x)' if regressed else ''
+        print(f"{name:<48} {value:>12} {f'{reference:g} {unit}':>12} {ratio:>6.2f}x{flag}")
+
+def update_baseline(results, tolerance):
+    """Re-pin every measured value, keeping per-benchmark tolerances and benchmarks that were not run"""
+    previous = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            previous = json.load(f).get('benchmarks', {})
+    benchmarks = dict(previous)
+    for name, result in sorted(results.items()):
+        entry = dict(result)
+        if 'tolerance' in previous.get(name, {}):
+            entry['tolerance'] = previous[name]['tolerance']
+        benchmarks[name] = entry
+    benchmarks = dict(sorted(benchmarks.items()))
+    with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+        json.dump({'tolerance': tolerance, 'benchmarks': benchmarks}, f, indent=2)
+        f.write('\n')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='fewer rounds and requests')
+    parser.add_argument('--skip-server', action='store_true', help='skip the real-server load test')
+    parser.add_argument('--only', help='run only benchmarks whose name starts with this prefix')
+    parser.add_argument('--update-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='default tolerance written with --update-baseline')
+    args = parser.parse_args()
+
+    only = args.only or ''
+    def wanted(group):
+        return group.startswith(only) or only.startswith(group)
+
+    results = {}
+    if wanted('micro.'):
+        results.update(micro_benchmarks(args.quick))
+    if wanted('e2e.'):
+        results.update(test_client_benchmark(500 if args.quick else 2000))
+        if not args.skip_server:
+            results.update(server_benchmark(8 if args.quick else 16, 50 if args.quick else 100))
+    results = {name: result for name, result in results.items() if name.startswith(only)}
+
+    with open(RESULTS_PATH, 'w', encoding='utf-8') as f:
+        json.dump({
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }, f, indent=2)
+        f.write('\n')
+
+    if args.update_baseline:
+        update_baseline(results, args.tolerance)
+        print(f"baseline updated: {len(results)} benchmarks -> {os.path.relpath(BASELINE_PATH)}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            baseline = json.load(f)
+    rows = compare(results, baseline)
+    print_report(rows)
+    regressed = [row[0] for row in rows if row[5]]
+    if regressed:
+        print(f"\n{len(regressed)} regression(s): {', '.join(regressed)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+def _ratio(matches, length):
+    """Same formula SequenceMatcher.ratio() uses, so bounds compare identically"""
+    return 2.0 * matches / length if length else 1.0
+
+class FuzzyIndex:
+    """
+    Precomputed index answering "which components does this word fuzzy-match?"
+
+    A word matches a variation when SequenceMatcher's ratio is above the
+    threshold. Candidates are first narrowed by word length (the ratio can never
+    exceed 2 * min(len) / total), then by shared character counts (the same
+    upper bound as quick_ratio), and only the survivors pay for a real
+    SequenceMatcher comparison. Results are memoized per word, and the buckets
+    themselves are built on the first lookup.
+    """
+
+    def __init__(self, vocabulary, threshold, cache_size=4096):
+        self.threshold = threshold
+        self._vocabulary = vocabulary
+        self._by_length = None
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def build(self):
+        """Build the length buckets now; otherwise the first lookup does it"""
+        if self._by_length is not None:
+            return self._by_length
+        threshold = self.threshold
+
+        entries = []
+        for component, variations in self._vocabulary.items():
+            for variation in variations:
+                variation = variation.lower()
+                entries.append((component, variation, Counter(variation), frozenset(variation)))
+
+        # Longest word that could still clear the threshold against any variation
+        longest = max((len(entry[1]) for entry in entries), default=0)
+        max_length = int(longest * (2 - threshold) / threshold) + 1 if threshold > 0 else longest * 2
+
+        by_length = {}
+        for length in range(max_length + 1):
+            candidates = [
+                entry for entry in entries
+                if _ratio(min(length, len(entry[1])), length + len(entry[1])) > threshold
+            ]
+            if candidates:
+                by_length[length] = candidates
+        self._by_length = by_length
+        return by_length
+
+    def _lookup(self, word):
+        """Components whose variations fuzzy-match word"""
+        by_length = self._by_length if self._by_length is not None else self.build()
+        candidates = by_length.get(len(word))
+        if not candidates:
+            return frozenset()
+
+        word_chars = frozenset(word)
+        word_counts = None
+        found = set()
+        for component, variation, variation_counts, variation_chars in candidates:
+            if component in found:
+                continue
+            total = len(word) + len(variation)
+            # Cheap bound from the distinct characters both sides share
+            common = word_chars & variation_chars
+            if _ratio(sum(variation_counts[char] for char in common), total) <= self.threshold:
+                continue
+            # Tighter bound from shared character counts
+            if word_counts is None:
+                word_counts = Counter(word)
+            shared = sum(min(variation_counts[char], word_counts[char]) for char in common)
+            if _ratio(shared, total) <= self.threshold:
+                continue
+            if SequenceMatcher(None, word, variation).ratio() > self.threshold:
+                found.add(component)
+        return frozenset(found)
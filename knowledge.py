@@ -0,0 +1,227 @@
+"""
+On-disk knowledge base.
+
+The editable source is a JSON file. It is compiled into a compact blob that
+every worker memory-maps read-only:
+
+    magic (6 bytes) | source mtime_ns (u64) | index length (u32) | index | data
+
+The index is JSON describing each section: either [offset, length] for a
+plain string, or an object of key -> [offset, length] for a nested section.
+Offsets point into the data region, which holds the UTF-8 leaf strings
+back to back. Strings are only decoded when a response is rendered.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections.abc import Mapping
+from threading import Lock
+
+MAGIC = b"VNRKB\x01"
+HEADER = struct.Struct("<6sQI")
+
+def validate(knowledge, required=None):
+    """
+    Raise ValueError unless knowledge has the shape the blob format stores:
+    an object whose values are strings or objects of strings. required maps
+    section -> None (must be a string) or a tuple of keys the section must have.
+    """
+    if not isinstance(knowledge, dict):
+        raise ValueError("knowledge base must be a JSON object")
+    for section, value in knowledge.items():
+        if isinstance(value, dict):
+            for key, text in value.items():
+                if not isinstance(text, str):
+                    raise ValueError(f"{section}.{key} must be a string")
+        elif not isinstance(value, str):
+            raise ValueError(f"{section} must be a string or an object of strings")
+    for section, keys in (required or {}).items():
+        value = knowledge.get(section)
+        if keys is None:
+            if not isinstance(value, str):
+                raise ValueError(f"{section} must be a string")
+            continue
+        if not isinstance(value, dict):
+            raise ValueError(f"{section} must be an object")
+        missing = [key for key in keys if key not in value]
+        if missing:
+            raise ValueError(f"{section} is missing {', '.join(missing)}")
+
+def compile_blob(source_path, blob_path, required=None):
+    """
+    Compile the JSON knowledge base at source_path into a blob at blob_path.
+    Raises ValueError if the source fails validate(); blob_path is left untouched.
+    """
+    mtime_ns = os.stat(source_path).st_mtime_ns
+    with open(source_path, encoding='utf-8') as f:
+        knowledge = json.load(f)
+    validate(knowledge, required)
+
+    data = bytearray()
+
+    def add(text):
+        encoded = text.encode('utf-8')
+        offset = len(data)
+        data.extend(encoded)
+        return offset, len(encoded)
+
+    index = {}
+    for section, value in knowledge.items():
+        if isinstance(value, dict):
+            index[section] = {key: add(text) for key, text in value.items()}
+        else:
+            index[section] = add(value)
+
+    encoded_index = json.dumps(index, separators=(',', ':')).encode('utf-8')
+
+    # Write to a private temp file and swap it in, so readers never see a partial blob
+    directory = os.path.dirname(os.path.abspath(blob_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.knowledge-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, mtime_ns, len(encoded_index)))
+            f.write(encoded_index)
+            f.write(data)
+        os.replace(tmp_path, blob_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return mtime_ns
+
+def _blob_source_mtime(blob_path):
+    """Source mtime_ns recorded in an existing blob, or None if it's missing or invalid"""
+    try:
+        with open(blob_path, 'rb') as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+    magic, mtime_ns, _ = HEADER.unpack(header)
+    return mtime_ns if magic == MAGIC else None
+
+class Section(Mapping):
+    """Read-only view of one nested section, decoding strings from the mapped blob on access"""
+    __slots__ = ('_buffer', '_fields')
+
+    def __init__(self, buffer, fields):
+        self._buffer = buffer
+        self._fields = fields
+
+    def __getitem__(self, key):
+        offset, length = self._fields[key]
+        return str(self._buffer[offset:offset + length], 'utf-8')
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+class Snapshot(Mapping):
+    """Immutable view of one version of the knowledge base"""
+
+    def __init__(self, buffer, data_offset, index, mtime_ns):
+        self.mtime_ns = mtime_ns
+        self._buffer = buffer
+        self._sections = {}
+        for section, value in index.items():
+            if isinstance(value, dict):
+                fields = {key: (data_offset + offset, length) for key, (offset, length) in value.items()}
+                self._sections[section] = Section(buffer, fields)
+            else:
+                offset, length = value
+                self._sections[section] = (data_offset + offset, length)
+
+    def __getitem__(self, key):
+        value = self._sections[key]
+        if isinstance(value, Section):
+            return value
+        offset, length = value
+        return str(self._buffer[offset:offset + length], 'utf-8')
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def __len__(self):
+        return len(self._sections)
+
+def load_snapshot(blob_path):
+    """Memory-map a compiled blob read-only and wrap it in a Snapshot"""
+    with open(blob_path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, mtime_ns, index_length = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"{blob_path} is not a compiled knowledge base")
+    index = json.loads(buffer[HEADER.size:HEADER.size + index_length])
+    return Snapshot(buffer, HEADER.size + index_length, index, mtime_ns)
+
+def default_blob_path(source_path):
+    """Compiled blob next to the source, or in the temp dir when that's read-only"""
+    directory = os.path.dirname(os.path.abspath(source_path))
+    name = os.path.splitext(os.path.basename(source_path))[0] + '.bin'
+    if os.access(directory, os.W_OK):
+        return os.path.join(directory, name)
+    return os.path.join(tempfile.gettempdir(), name)
+
+class KnowledgeStore:
+    """
+    Hot-reloading holder of the current knowledge base snapshot.
+
+    refresh() is cheap and meant to be called per request: at most once every
+    check_interval seconds it stats the source file, and when the mtime
+    changed it recompiles (or reuses an up-to-date blob from another worker),
+    maps the new blob and swaps the snapshot. Callers that grabbed the old
+    snapshot keep reading it until they drop it. A source that is not valid
+    JSON or fails validate(required) is skipped and the old snapshot stays.
+    """
+
+    def __init__(self, source_path, blob_path=None, check_interval=1.0, on_reload=None, required=None):
+        self.source_path = source_path
+        self.blob_path = blob_path or default_blob_path(source_path)
+        self.required = required
+        self.check_interval = check_interval
+        self.on_reload = on_reload
+        self.reloads = 0
+        self._lock = Lock()
+        self._next_check = 0.0
+        self._snapshot = self._load()
+
+    def _load(self):
+        mtime_ns = os.stat(self.source_path).st_mtime_ns
+        if _blob_source_mtime(self.blob_path) != mtime_ns:
+            compile_blob(self.source_path, self.blob_path, self.required)
+        return load_snapshot(self.blob_path)
+
+    def snapshot(self):
+        """The current snapshot; hold on to it for the duration of a request"""
+        return self._snapshot
+
+    def refresh(self):
+        """Reload if the source changed since the last check; returns True on reload"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        with self._lock:
+            if now < self._next_check:
+                return False
+            self._next_check = now + self.check_interval
+            try:
+                mtime_ns = os.stat(self.source_path).st_mtime_ns
+            except OSError:
+                return False
+            if mtime_ns == self._snapshot.mtime_ns:
+                return False
+            try:
+                snapshot = self._load()
+            except (OSError, ValueError):
+                # Half-written or invalid source: keep serving the old snapshot, retry next interval
+                return False
+            self._snapshot = snapshot
+            self.reloads += 1
+        if self.on_reload is not None:
+            self.on_reload()
+        return True
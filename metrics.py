@@ -0,0 +1,123 @@
+"""
+Low-overhead request metrics rendered in the Prometheus text format.
+
+Stage timings are sampled: with sample_rate 0 no clock is read at all, and
+counters cost one locked dict update.
+"""
+import random
+import threading
+import time
+
+# Latency histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+class Stopwatch:
+    """Times consecutive stages of one request; lap() records the time since the previous lap"""
+    __slots__ = ('_metrics', '_start', '_last')
+
+    def __init__(self, metrics):
+        self._metrics = metrics
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self._metrics.observe(stage, now - self._last)
+        self._last = now
+
+    def finish(self, stage='total'):
+        """Record the whole request, from creation until now"""
+        self._metrics.observe(stage, time.perf_counter() - self._start)
+
+class Metrics:
+    def __init__(self, prefix, sample_rate=1.0, buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.sample_rate = sample_rate
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        self._descriptions = {}
+
+    def describe(self, name, kind, help_text):
+        self._descriptions[name] = (kind, help_text)
+
+    def sample(self):
+        """A Stopwatch if this request is sampled, else None"""
+        if self.sample_rate <= 0:
+            return None
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return None
+        return Stopwatch(self)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def increment(self, name, label=None, value=None, amount=1):
+        key = (name, label, value)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self, extra=()):
+        """
+        Prometheus text exposition of every metric.
+        extra is an iterable of (name, kind, help, value) for values owned elsewhere.
+        """
+        prefix = self.prefix
+        with self._lock:
+            stages = {stage: (list(h.counts), h.sum, h.count) for stage, h in self._stages.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        name = f"{prefix}_stage_seconds"
+        lines.append(f"# HELP {name} Time spent in each request pipeline stage (sampled).")
+        lines.append(f"# TYPE {name} histogram")
+        for stage in sorted(stages):
+            counts, total, count = stages[stage]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total:.9f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        by_name = {}
+        for (counter, label, value), amount in counters.items():
+            by_name.setdefault(counter, []).append((label, value, amount))
+        for counter in sorted(by_name):
+            kind, help_text = self._descriptions.get(counter, ('counter', counter))
+            full_name = f"{prefix}_{counter}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for label, value, amount in sorted(by_name[counter], key=lambda item: str(item[1])):
+                labels = f'{{{label}="{value}"}}' if label else ''
+                lines.append(f"{full_name}{labels} {amount}")
+
+        for metric, kind, help_text, value in extra:
+            full_name = f"{prefix}_{metric}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            lines.append(f"{full_name} {value}")
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,109 @@
+import hashlib
+import re
+from collections import OrderedDict
+from threading import Lock
+
+_UNCLEAN_RE = re.compile(r'[^a-z0-9\s]')
+
+class NormalizedQuery:
+    """
+    A message normalized once for every /chat check.
+
+    lower is the lowercased text, clean is lower with everything but letters,
+    digits and whitespace stripped, and tokens / token_set are clean's words.
+    All but lower are computed on first use, so a stage that only needs the
+    lowercased text (routing, the injection scan) never pays for the rest.
+    """
+    __slots__ = ('text', 'lower', '_clean', '_tokens', '_token_set')
+
+    def __init__(self, text):
+        self.text = text
+        self.lower = text.lower()
+        self._clean = self._tokens = self._token_set = None
+
+    @property
+    def clean(self):
+        if self._clean is None:
+            self._clean = _UNCLEAN_RE.sub('', self.lower)
+        return self._clean
+
+    @property
+    def tokens(self):
+        if self._tokens is None:
+            self._tokens = self.clean.split()
+        return self._tokens
+
+    @property
+    def token_set(self):
+        if self._token_set is None:
+            self._token_set = frozenset(self.tokens)
+        return self._token_set
+
+def normalize(value):
+    """NormalizedQuery for a message; an already normalized query is returned as is"""
+    if isinstance(value, NormalizedQuery):
+        return value
+    return NormalizedQuery(value)
+
+def message_key(message):
+    """Fixed-size memo key for a message of any length"""
+    return hashlib.blake2b(message.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+class DecisionMemo:
+    """
+    Bounded LRU of final /chat decisions keyed by a hash of the raw message.
+
+    Retries and scripted clients resend identical messages, and the decision
+    for a message only changes with the knowledge base, so invalidate() must
+    be called whenever it is reloaded. maxsize 0 disables the memo.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, message, decide):
+        """
+        Return (decision, hit) for message, calling decide(message) on a miss.
+        """
+        if self.maxsize <= 0:
+            return decide(message), False
+        key = message_key(message)
+        with self._lock:
+            decision = self._entries.get(key)
+            if decision is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return decision, True
+            self.misses += 1
+            generation = self._generation
+
+        decision = decide(message)
+
+        with self._lock:
+            # Don't store decisions made against a knowledge base that was swapped meanwhile
+            if generation == self._generation:
+                self._entries[key] = decision
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return decision, False
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
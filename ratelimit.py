@@ -0,0 +1,146 @@
+"""
+Token-bucket rate limiting keyed by session id or client IP.
+
+Backends mirror the session store:
+
+    memory             in-process sharded buckets (default)
+    sqlite:/path.db    buckets in a SQLite file shared by every worker on the host
+"""
+import math
+import threading
+import time
+import zlib
+
+def parse_limit(spec):
+    """'rate:burst' (tokens per second : bucket size) -> (rate, burst), or None for 'off'"""
+    if spec.strip().lower() in ('', '0', 'off'):
+        return None
+    rate, _, burst = spec.partition(':')
+    rate = float(rate)
+    burst = float(burst) if burst else max(1.0, rate)
+    if rate <= 0 or burst <= 0:
+        raise ValueError(f"Invalid rate limit: {spec!r}")
+    return rate, burst
+
+class MemoryBuckets:
+    """
+    Token buckets in independently locked shards. A bucket left alone for
+    burst / rate seconds is full again, which is the same as not existing,
+    so idle buckets are pruned whenever a shard grows past its share of
+    max_keys.
+    """
+
+    def __init__(self, rate, burst, max_keys=100_000, shards=16):
+        self.rate = rate
+        self.burst = burst
+        self._shards = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._shard_limit = max(1, max_keys // shards)
+        self._refill_time = burst / rate
+
+    def acquire(self, key, cost=1.0):
+        """Take cost tokens from key's bucket; returns 0.0 if allowed, else seconds until it would be"""
+        number = zlib.crc32(key.encode('utf-8')) % len(self._shards)
+        shard, lock = self._shards[number], self._locks[number]
+        now = time.monotonic()
+        with lock:
+            bucket = shard.get(key)
+            if bucket is None:
+                if len(shard) >= self._shard_limit:
+                    self._prune(shard, now)
+                bucket = shard[key] = [self.burst, now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return 0.0
+            bucket[0] = tokens
+            return (cost - tokens) / self.rate
+
+    def refund(self, key, cost=1.0):
+        """Give back tokens taken by acquire() for a request that was rejected elsewhere"""
+        number = zlib.crc32(key.encode('utf-8')) % len(self._shards)
+        with self._locks[number]:
+            bucket = self._shards[number].get(key)
+            if bucket is not None:
+                bucket[0] = min(self.burst, bucket[0] + cost)
+
+    def _prune(self, shard, now):
+        idle = [key for key, (_, last) in shard.items() if now - last >= self._refill_time]
+        for key in idle:
+            del shard[key]
+        # Still full of active keys: drop the oldest half rather than grow without bound
+        if len(shard) >= self._shard_limit:
+            for key in list(shard)[:len(shard) // 2]:
+                del shard[key]
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+class SQLiteBuckets:
+    """Token buckets in a SQLite table, so every worker process draws from the same bucket"""
+
+    def __init__(self, path, rate, burst, table='buckets'):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.table = table
+        self._local = threading.local()
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, tokens REAL NOT NULL, last REAL NOT NULL)")
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            import sqlite3  # deferred so the default memory buckets never load it
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def acquire(self, key, cost=1.0):
+        """Take cost tokens from key's bucket; returns 0.0 if allowed, else seconds until it would be"""
+        db = self._db()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(f"SELECT tokens, last FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / self.rate
+            db.execute(
+                f"INSERT INTO {self.table} (key, tokens, last) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, last = excluded.last",
+                (key, tokens, now),
+            )
+            # Opportunistically forget buckets that have long since refilled
+            if not int(now * 1000) % 1024:
+                db.execute(f"DELETE FROM {self.table} WHERE last < ?", (now - self.burst / self.rate,))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return wait
+
+    def refund(self, key, cost=1.0):
+        """Give back tokens taken by acquire() for a request that was rejected elsewhere"""
+        self._db().execute(
+            f"UPDATE {self.table} SET tokens = MIN(?, tokens + ?) WHERE key = ?",
+            (self.burst, cost, key),
+        )
+
+def create_buckets(backend, rate, burst, table='buckets'):
+    """Build token buckets from a backend spec: 'memory' or 'sqlite:/path/to/limits.db'"""
+    if backend == 'memory':
+        return MemoryBuckets(rate, burst)
+    if backend.startswith('sqlite:'):
+        return SQLiteBuckets(backend[len('sqlite:'):], rate, burst, table)
+    raise ValueError(f"Unknown rate limit backend: {backend!r}")
+
+def retry_after(seconds):
+    """Retry-After header value: whole seconds, at least 1"""
+    return str(max(1, math.ceil(seconds)))
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from threading import Lock
+
+class CachedResponse:
+    """
+    A rendered answer plus its encoded JSON body, filled in on first use,
+    and that body compressed per content coding once a client asks for it.
+    """
+    __slots__ = ('text', 'body', 'compressed')
+
+    def __init__(self, text):
+        self.text = text
+        self.body = None
+        self.compressed = {}
+
+class ResponseCache:
+    """
+    Bounded LRU of rendered answers keyed by resolved intent and section set.
+
+    The number of distinct answers is small and fixed, so once warm almost
+    every /chat answer is served from here. invalidate() must be called
+    whenever the knowledge base changes.
+    """
+
+    def __init__(self, render, maxsize=256):
+        self._render = render
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the CachedResponse for key, rendering it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = self._generation
+
+        entry = CachedResponse(self._render(*key))
+
+        with self._lock:
+            # Don't store answers rendered from a knowledge base that was swapped mid-render
+            if generation == self._generation:
+                self._entries[key] = entry
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def peek(self, key):
+        """The cached CachedResponse for key, or None; never renders"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def invalidate(self):
+        """Drop every cached answer, e.g. after the knowledge base changed"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
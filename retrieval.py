@@ -0,0 +1,80 @@
+import heapq
+import math
+import re
+import time
+from array import array
+from collections import Counter
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Words that carry no topic and would otherwise pull in arbitrary sections
+STOPWORDS = frozenset("""
+a an and any are as at be can could do does for from give how i in is it me my of on or
+please show so tell that the their there this to u us vjiet vnr was what when which who why
+will with would you your
+""".split())
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+class BM25Index:
+    """
+    Inverted index over short text sections, ranked with Okapi BM25.
+
+    Postings are stored per term as two parallel arrays (document numbers and
+    precomputed BM25 weights), so answering a query is just summing the
+    postings of its terms and taking the top k.
+    """
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.doc_ids = []
+        term_counts = []
+        for doc_id, text in documents:
+            self.doc_ids.append(doc_id)
+            term_counts.append(Counter(tokenize(text)))
+
+        total = len(term_counts)
+        lengths = [sum(counts.values()) for counts in term_counts]
+        average = sum(lengths) / total if total else 0.0
+        norms = [k1 * (1 - b + b * length / average) if average else k1 for length in lengths]
+
+        frequencies = Counter(term for counts in term_counts for term in counts)
+        self.idf = {
+            term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in frequencies.items()
+        }
+
+        self._postings = {}
+        for number, counts in enumerate(term_counts):
+            for term, tf in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array('I'), array('f'))
+                postings[0].append(number)
+                postings[1].append(self.idf[term] * tf * (k1 + 1) / (tf + norms[number]))
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def search(self, query, k=3, budget=None):
+        """
+        Top k (doc_id, score) pairs for query, best first.
+        With a budget (seconds), rarest terms are scored first and the rest are
+        skipped once the budget runs out.
+        """
+        terms = {term for term in tokenize(query) if term not in STOPWORDS and term in self._postings}
+        if not terms:
+            return []
+
+        deadline = time.perf_counter() + budget if budget is not None else None
+        scores = {}
+        # Ties are broken by term and then by document order, so results don't depend on hash seeds
+        for term in sorted(terms, key=lambda term: (-self.idf[term], term)):
+            documents, weights = self._postings[term]
+            for number, weight in zip(documents, weights):
+                scores[number] = scores.get(number, 0.0) + weight
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.doc_ids[number], score) for number, score in best]
@@ -0,0 +1,102 @@
+import re
+
+def _compile_keywords(keywords):
+    """One alternation per keyword list, matched as plain substrings"""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+# A keyword also names its topic in the plural
+PLURAL_ENDINGS = ('', 's', 'es')
+
+class Router:
+    """
+    Priority-ordered intent table, compiled once on first use.
+
+    Each route is (intent, keywords, sections, first_section_only), where
+    sections is a list of (section, keywords). Keywords are matched as
+    substrings of the lowercased query, exactly like the original
+    `any(word in query_lower ...)` checks, so "hi" still matches "which".
+
+    named() answers a different question, which topics a query mentions, so it
+    matches whole words only and ignores the keywords listed in filler.
+    """
+
+    def __init__(self, routes, filler=()):
+        self._source = routes
+        self._filler = frozenset(filler)
+        self._routes = None
+        self._words = None
+
+    def compile(self):
+        """Compile the route table now; otherwise the first route() call does it"""
+        if self._routes is None:
+            # Word index first: named() relies on it existing once _routes is set
+            words, phrases = {}, {}
+            for number, (intent, keywords, sections, _) in enumerate(self._source):
+                targets = [(keyword, (number, None)) for keyword in keywords]
+                for section, section_keywords in sections:
+                    targets.extend((keyword, (number, section)) for keyword in section_keywords)
+                for keyword, target in targets:
+                    if keyword in self._filler:
+                        continue
+                    for ending in PLURAL_ENDINGS:
+                        if ' ' in keyword:
+                            phrases.setdefault(f' {keyword}{ending} ', []).append(target)
+                        else:
+                            words.setdefault(keyword + ending, []).append(target)
+            self._words = (words, list(phrases.items()))
+            self._routes = [
+                (
+                    intent,
+                    _compile_keywords(keywords),
+                    [(section, _compile_keywords(section_keywords)) for section, section_keywords in sections],
+                    first_section_only,
+                )
+                for intent, keywords, sections, first_section_only in self._source
+            ]
+        return self._routes
+
+    def route(self, query_lower):
+        """
+        Resolve a lowercased query to (intent, sections).
+        The first intent in priority order wins; sections lists the sub-sections
+        the query asked for (empty means the intent's default view).
+        Returns (None, ()) when no intent matches.
+        """
+        for intent, pattern, sections, first_section_only in self._routes or self.compile():
+            if pattern.search(query_lower) is None:
+                continue
+            matched = []
+            for section, section_pattern in sections:
+                if section_pattern.search(query_lower) is not None:
+                    matched.append(section)
+                    if first_section_only:
+                        break
+            return intent, tuple(matched)
+        return None, ()
+
+    def named(self, query_lower):
+        """
+        Every (intent, sections) the lowercased query names as whole words, in
+        priority order. Unlike route(), all intents and all of their sections
+        are reported, whatever first_section_only says.
+        """
+        if self._routes is None:
+            self.compile()
+        words, phrases = self._words
+        tokens = WORD_RE.findall(query_lower)
+        hits = [target for token in set(tokens) for target in words.get(token, ())]
+        if phrases:
+            padded = ' ' + ' '.join(tokens) + ' '
+            for phrase, targets in phrases:
+                if phrase in padded:
+                    hits.extend(targets)
+        if not hits:
+            return []
+        found = []
+        for number in sorted({number for number, _ in hits}):
+            intent, _, sections, _ = self._source[number]
+            named = {section for hit, section in hits if hit == number}
+            found.append((intent, tuple(section for section, _ in sections if section in named)))
+        return found
@@ -0,0 +1,87 @@
+import re
+from functools import lru_cache
+
+# Prompt injection rules as (rule name, pattern, trigger literals). A pattern can
+# only match where one of its lowercase literals occurs, so scan() looks for the
+# literals with plain substring checks and only runs the patterns they point at.
+#
+# special_tokens, translate_secret and convert_secret were `<\|.*?\|>` and
+# `translate.+(flag|secret)`. Retried from every marker, those spans made
+# '<|' * 2000 cost ~80 ms. Only the first marker on a line can matter (any later
+# one is followed by a subset of the same text), so they are anchored at line
+# starts and commit to that first marker with an atomic group: same matches,
+# linear time. They report the start of the line as their match position.
+INJECTION_RULES = [
+    ("ignore_instructions", r'ignore\s+(previous|above|prior|all)\s+(instructions?|prompts?|rules?)', ('ignore',)),
+    ("system_prompt", r'system\s+(prompt|instructions?|message)', ('system',)),
+    ("you_are_now", r'you\s+are\s+(now|a|an)\s+(?!student|asking|interested)', ('you',)),  # Allow "you are a student" type queries
+    ("forget_previous", r'forget\s+(everything|all|previous|prior)', ('forget',)),
+    ("disregard_previous", r'disregard\s+(previous|above|prior|all)', ('disregard',)),
+    ("new_instructions", r'new\s+(instructions?|role|character|personality)', ('new',)),
+    ("developer_mode", r'developer\s+mode', ('developer',)),
+    ("jailbreak", r'jailbreak', ('jailbreak',)),
+    ("sudo", r'sudo\s+', ('sudo',)),
+    ("admin_access", r'admin\s+(access|mode|privileges)', ('admin',)),
+    ("reveal_secret", r'reveal\s+(the\s+)?(flag|secret|password|hidden)', ('reveal',)),
+    ("show_secret", r'show\s+(me\s+)?(the\s+)?(flag|secret|password)', ('show',)),
+    ("what_is_secret", r'what\s+is\s+(the\s+)?(flag|secret|password)', ('what',)),
+    ("give_secret", r'give\s+(me\s+)?(the\s+)?(flag|secret)', ('give',)),
+    ("tell_secret", r'tell\s+me\s+(the\s+)?(flag|secret)', ('tell',)),
+    ("bypass_security", r'bypass\s+(security|protection|filter)', ('bypass',)),
+    ("override_instructions", r'override\s+(instructions?|security|rules?)', ('override',)),
+    ("inst_tags", r'\[INST\]|\[/INST\]', ('[inst]', '[/inst]')),
+    ("special_tokens", r'(?m)^(?>[^\n]*?<\|)[^\n]*?\|>', ('<|',)),
+    ("role_markers", r'SYSTEM:|USER:|ASSISTANT:', ('system:', 'user:', 'assistant:')),
+    ("markdown_heading", r'\\n\\n###', ('\\n\\n###',)),
+    ("act_as", r'act\s+as\s+(?!a\s+student|an\s+advisor)', ('act',)),  # Allow "act as a student"
+    ("pretend", r'pretend\s+(to\s+be|you\s+are)', ('pretend',)),
+    ("roleplay", r'roleplay\s+as', ('roleplay',)),
+    ("simulate", r'simulate\s+being', ('simulate',)),
+    ("print_secret", r'print\s+(the\s+)?(flag|secret|instructions?)', ('print',)),
+    ("execute_code", r'execute\s+(code|command)', ('execute',)),
+    ("eval_call", r'eval\(', ('eval(',)),
+    ("encoding", r'base64|rot13|encode|decode', ('base64', 'rot13', 'encode', 'decode')),
+    ("translate_secret", r'(?m)^(?>[^\n]*?translate)[^\n]+?(flag|secret)', ('translate',)),
+    ("convert_secret", r'(?m)^(?>[^\n]*?convert)[^\n]+?(flag|secret)', ('convert',)),
+    ("flag_format", r'w4rz0n3', ('w4rz0n3',)),  # Block direct flag format mentions
+]
+
+def _compile_rules(rules):
+    """
+    ([(name, compiled pattern)] in rule order, [(literal, rule number)]).
+    The literals are flattened so the prefilter is one tight loop of substring checks.
+    """
+    compiled = [(name, re.compile(pattern, re.IGNORECASE)) for name, pattern, _ in rules]
+    triggers = [(literal, number) for number, (_, _, literals) in enumerate(rules) for literal in literals]
+    return compiled, triggers
+
+@lru_cache(maxsize=None)
+def _rules():
+    """The compiled rules, built on first use rather than at import"""
+    return _compile_rules(INJECTION_RULES)
+
+def warm_up():
+    """Compile the rule set now instead of on the first scan"""
+    _rules()
+
+def scan(text):
+    """
+    Scan text against every injection rule.
+    Returns the name of the rule that fired (leftmost match wins), or None.
+    """
+    rules, triggers = _rules()
+    if text.isascii():
+        lowered = text.lower()
+        hit = {number for literal, number in triggers if literal in lowered}
+        if not hit:
+            return None
+        rules = [rule for number, rule in enumerate(rules) if number in hit]
+    # Otherwise run every rule: case-insensitive matching folds a few non-ASCII
+    # letters onto ASCII ones ('ſ' matches 's'), which substring checks can't see
+
+    found, found_at = None, len(text) + 1
+    for name, pattern in rules:
+        match = pattern.search(text)
+        if match is not None and match.start() < found_at:
+            found, found_at = name, match.start()
+    return found
@@ -0,0 +1,232 @@
+"""
+Server-side session store holding per-session attempt counters.
+
+Only an opaque session id travels in the cookie. Backends:
+
+    memory             in-process sharded dict with TTL eviction (default)
+    sqlite:/path.db    SQLite file in WAL mode, shared by every worker on the host
+"""
+import secrets
+import threading
+import time
+import zlib
+
+class MemorySessionStore:
+    """
+    Sessions in a fixed number of independently locked shards, so concurrent
+    requests rarely contend. Expired sessions are dropped lazily on access
+    and by a sweep of one shard every sweep_every operations.
+
+    Each shard keeps its sessions in least recently used order, and once a
+    shard holds its share of max_sessions, creating a session evicts the
+    shard's least recently used one.
+    """
+
+    def __init__(self, ttl, max_sessions=100_000, shards=16, sweep_every=1024):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._shard_limit = max(1, max_sessions // shards)
+        self._shards = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._totals_lock = threading.Lock()
+        self._active = 0
+        self._total_attempts = 0
+        self._operations = 0
+        self._sweep_every = sweep_every
+        self._next_sweep = 0
+
+    def _shard(self, session_id):
+        number = zlib.crc32(session_id.encode('utf-8')) % len(self._shards)
+        return self._shards[number], self._locks[number]
+
+    def _tick(self):
+        self._operations += 1
+        if self._operations % self._sweep_every == 0:
+            self._sweep(self._next_sweep)
+            self._next_sweep = (self._next_sweep + 1) % len(self._shards)
+
+    def _sweep(self, number):
+        now = time.monotonic()
+        shard, lock = self._shards[number], self._locks[number]
+        with lock:
+            expired = [session_id for session_id, entry in shard.items() if entry[1] <= now]
+            for session_id in expired:
+                del shard[session_id]
+        if expired:
+            with self._totals_lock:
+                self._active -= len(expired)
+
+    def create(self):
+        session_id = secrets.token_hex(16)
+        shard, lock = self._shard(session_id)
+        evicted = 0
+        with lock:
+            while len(shard) >= self._shard_limit:
+                del shard[next(iter(shard))]
+                evicted += 1
+            shard[session_id] = [0, time.monotonic() + self.ttl]
+        with self._totals_lock:
+            self._active += 1 - evicted
+        self._tick()
+        return session_id
+
+    def _live_entry(self, shard, session_id, now, touch=False):
+        """
+        Entry for session_id (caller holds the shard lock), evicting it if expired.
+        touch marks it as the shard's most recently used session.
+        """
+        entry = shard.get(session_id)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del shard[session_id]
+            with self._totals_lock:
+                self._active -= 1
+            return None
+        if touch:
+            shard[session_id] = shard.pop(session_id)
+        return entry
+
+    def exists(self, session_id):
+        """True if the session is live; also extends its TTL"""
+        shard, lock = self._shard(session_id)
+        now = time.monotonic()
+        with lock:
+            entry = self._live_entry(shard, session_id, now, touch=True)
+            if entry is not None:
+                entry[1] = now + self.ttl
+        self._tick()
+        return entry is not None
+
+    def incr_attempts(self, session_id, amount=1):
+        shard, lock = self._shard(session_id)
+        now = time.monotonic()
+        with lock:
+            entry = self._live_entry(shard, session_id, now, touch=True)
+            if entry is None:
+                return 0
+            entry[0] += amount
+            entry[1] = now + self.ttl
+            attempts = entry[0]
+        with self._totals_lock:
+            self._total_attempts += amount
+        return attempts
+
+    def attempts(self, session_id):
+        shard, lock = self._shard(session_id)
+        with lock:
+            entry = self._live_entry(shard, session_id, time.monotonic())
+            return entry[0] if entry is not None else 0
+
+    def totals(self):
+        with self._totals_lock:
+            return {'active_sessions': self._active, 'total_attempts': self._total_attempts}
+
+class SQLiteSessionStore:
+    """
+    Sessions in a SQLite database so every worker process shares one view.
+    Running totals live in a one-row table updated in the same transaction
+    as each change, so cluster-wide statistics are a single-row read.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._connect().db.execute("PRAGMA journal_mode=WAL")
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, attempts INTEGER NOT NULL DEFAULT 0, expires REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS totals ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), active_sessions INTEGER NOT NULL, "
+                "total_attempts INTEGER NOT NULL)"
+            )
+            db.execute("INSERT OR IGNORE INTO totals VALUES (0, 0, 0)")
+
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            import sqlite3  # only the SQLite backend pays for importing it
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return _Transaction(db)
+
+    def _evict_expired(self, db, now):
+        evicted = db.execute("DELETE FROM sessions WHERE expires <= ?", (now,)).rowcount
+        if evicted:
+            db.execute("UPDATE totals SET active_sessions = active_sessions - ? WHERE id = 0", (evicted,))
+
+    def create(self):
+        session_id = secrets.token_hex(16)
+        now = time.time()
+        with self._connect() as db:
+            self._evict_expired(db, now)
+            db.execute("INSERT INTO sessions (id, attempts, expires) VALUES (?, 0, ?)", (session_id, now + self.ttl))
+            db.execute("UPDATE totals SET active_sessions = active_sessions + 1 WHERE id = 0")
+        return session_id
+
+    def exists(self, session_id):
+        """True if the session is live; also extends its TTL"""
+        now = time.time()
+        with self._connect() as db:
+            updated = db.execute(
+                "UPDATE sessions SET expires = ? WHERE id = ? AND expires > ?",
+                (now + self.ttl, session_id, now),
+            ).rowcount
+        return updated == 1
+
+    def incr_attempts(self, session_id, amount=1):
+        now = time.time()
+        with self._connect() as db:
+            updated = db.execute(
+                "UPDATE sessions SET attempts = attempts + ?, expires = ? WHERE id = ? AND expires > ?",
+                (amount, now + self.ttl, session_id, now),
+            ).rowcount
+            if not updated:
+                return 0
+            db.execute("UPDATE totals SET total_attempts = total_attempts + ? WHERE id = 0", (amount,))
+            return db.execute("SELECT attempts FROM sessions WHERE id = ?", (session_id,)).fetchone()[0]
+
+    def attempts(self, session_id):
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT attempts FROM sessions WHERE id = ? AND expires > ?", (session_id, time.time())
+            ).fetchone()
+        return row[0] if row is not None else 0
+
+    def totals(self):
+        with self._connect() as db:
+            active, attempts = db.execute(
+                "SELECT active_sessions, total_attempts FROM totals WHERE id = 0"
+            ).fetchone()
+        return {'active_sessions': active, 'total_attempts': attempts}
+
+class _Transaction:
+    """Context manager running a block in one IMMEDIATE transaction on a connection"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+def create_session_store(backend, ttl, max_sessions=100_000):
+    """
+    Build a store from a backend spec: 'memory' or 'sqlite:/path/to/sessions.db'.
+    max_sessions bounds the memory backend; SQLite sessions live on disk until they expire.
+    """
+    if backend == 'memory':
+        return MemorySessionStore(ttl, max_sessions)
+    if backend.startswith('sqlite:'):
+        return SQLiteSessionStore(backend[len('sqlite:'):], ttl)
+    raise ValueError(f"Unknown session backend: {backend!r}")
@@ -0,0 +1,41 @@
+"""Request validation and method handling in the ASGI app"""
+import asyncio
+import json
+
+import asgi
+
+def call(method, path, payload=None):
+    """(status, headers, body) for one request through asgi.application"""
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    requests = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return requests.pop(0) if requests else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'headers': [], 'client': ('192.0.2.20', 1)}
+    asyncio.run(asgi.application(scope, receive, send))
+    return sent[0]['status'], dict(sent[0]['headers']), b''.join(message.get('body', b'') for message in sent[1:])
+
+def test_non_string_message_is_rejected():
+    for path in ('/chat', '/chat/stream'):
+        status, _, body = call('POST', path, {'message': 123})
+        assert status == 400
+        assert json.loads(body) == {'error': 'message must be a string'}
+
+def test_head_is_served_like_get_without_a_body():
+    status, headers, body = call('GET', '/')
+    head_status, head_headers, head_body = call('HEAD', '/')
+    assert (head_status, head_body) == (status, b'')
+    assert head_headers[b'content-length'] == headers[b'content-length'] == str(len(body)).encode('latin-1')
+
+def test_shared_request_checks(monkeypatch):
+    assert call('POST', '/chat/batch', {'messages': 'hi'})[0] == 400
+    assert call('POST', '/chat', [1, 2])[0] == 400
+    monkeypatch.setattr(asgi, 'pending', asgi.CHAT_MAX_PENDING)
+    for path in ('/chat', '/chat/stream', '/chat/batch'):
+        status, headers, _ = call('POST', path, {'message': 'hi', 'messages': ['hi']})
+        assert (status, headers[b'retry-after']) == (503, b'1')
@@ -0,0 +1,67 @@
+"""Precompressed static responses, Accept-Encoding negotiation and /chat body compression"""
+import gzip
+
+import app
+from assets import ENCODINGS, StaticAsset, accepted_encodings, choose_encoding, etag_matches
+
+BODY = b'<html>' + b'VNR knowledge base ' * 200 + b'</html>'
+
+def test_q_values_are_honoured():
+    assert accepted_encodings('gzip;q=0.5, br;q=0') == {'gzip'}
+    assert choose_encoding('gzip;q=0, identity', ENCODINGS) == 'identity'
+    assert choose_encoding('*', ('gzip',)) == 'gzip'
+    assert choose_encoding('*, gzip;q=0', ('gzip',)) == 'identity'
+    assert choose_encoding('', ('gzip',)) == 'identity'
+    assert choose_encoding('GZIP; Q=1.0', ('gzip',)) == 'gzip'
+
+def test_each_coding_has_its_own_etag():
+    asset = StaticAsset(BODY, 'text/html')
+    assert gzip.decompress(asset.variants['gzip']) == BODY
+    assert len(set(asset.etags.values())) == len(asset.variants)
+    status, body, headers = asset.select('gzip', None)
+    headers = dict(headers)
+    assert (status, headers['Content-Encoding'], headers['ETag']) == (200, 'gzip', asset.etags['gzip'])
+    assert headers['Vary'] == 'Accept-Encoding'
+    assert asset.select('', None)[1] == BODY
+
+def test_if_none_match_gives_304():
+    asset = StaticAsset(BODY, 'text/html')
+    etag = asset.etags['gzip']
+    assert asset.select('gzip', etag)[:2] == (304, b'')
+    assert asset.select('gzip', f'"other", W/{etag}')[0] == 304
+    assert asset.select('gzip', '*')[0] == 304
+    # The identity variant has a different ETag, so a gzip ETag doesn't validate it
+    assert asset.select('', etag)[0] == 200
+    assert not etag_matches(None, etag)
+
+def test_incompressible_body_has_no_compressed_variant():
+    asset = StaticAsset(b'ok', 'text/plain')
+    assert set(asset.variants) == {'identity'}
+    assert 'Content-Encoding' not in dict(asset.select('gzip', None)[2])
+
+def test_index_page_revalidates():
+    client = app.app.test_client()
+    first = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200
+    assert first.headers['Content-Encoding'] == 'gzip'
+    again = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+    assert (again.status_code, again.data) == (304, b'')
+
+def test_large_chat_bodies_are_compressed():
+    client = app.app.test_client()
+    environ = {'REMOTE_ADDR': '192.0.2.60'}
+    plain = client.post('/chat', json={'message': 'list every course'}, environ_base=environ)
+    assert len(plain.data) >= app.COMPRESS_MIN_SIZE
+    assert 'Content-Encoding' not in plain.headers
+    compressed = client.post('/chat', json={'message': 'list every course'}, environ_base=environ,
+                             headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.data) == plain.data
+
+def test_small_chat_bodies_are_sent_as_is():
+    client = app.app.test_client()
+    response = client.post('/chat', json={'message': 'hi'}, environ_base={'REMOTE_ADDR': '192.0.2.61'},
+                           headers={'Accept-Encoding': 'gzip'})
+    assert len(response.data) < app.COMPRESS_MIN_SIZE
+    assert 'Content-Encoding' not in response.headers
@@ -0,0 +1,50 @@
+"""/chat/batch: ordering, per-item errors and within-batch dedup"""
+import json
+
+import app
+
+def test_results_keep_order_and_report_item_errors():
+    messages = ['placements', 42, '', 'hostel fees', 'placements']
+    body, attempts = app.process_batch(messages)
+    results = json.loads(body)['results']
+    assert len(results) == len(messages)
+    assert results[0] == results[4] == json.loads(app.encode_body(app.process_message('placements')))
+    assert results[1] == {'error': 'message must be a string'}
+    assert results[2] == json.loads(app.encode_body(app.EMPTY_RESPONSE))
+    assert results[3] == json.loads(app.encode_body(app.process_message('hostel fees')))
+    assert attempts == 3
+
+def test_identical_messages_are_processed_once(monkeypatch):
+    calls = []
+    process_message = app.process_message
+
+    def counting(message, timing=None):
+        calls.append(message)
+        return process_message(message, timing)
+
+    monkeypatch.setattr(app, 'process_message', counting)
+    app.process_batch(['faculty', 'faculty', 'labs', 'faculty'])
+    assert calls == ['faculty', 'labs']
+
+def test_failing_item_does_not_fail_the_batch(monkeypatch):
+    process_message = app.process_message
+
+    def failing(message, timing=None):
+        if message == 'boom':
+            raise RuntimeError('boom')
+        return process_message(message, timing)
+
+    monkeypatch.setattr(app, 'process_message', failing)
+    results = json.loads(app.process_batch(['boom', 'faculty'])[0])['results']
+    assert results[0] == {'error': 'internal error'}
+    assert 'response' in results[1]
+
+def test_endpoint_matches_single_chat_answers():
+    client = app.app.test_client()
+    environ = {'REMOTE_ADDR': '192.0.2.50'}
+    response = client.post('/chat/batch', json={'messages': ['faculty', 'labs']}, environ_base=environ)
+    assert response.status_code == 200
+    singles = [client.post('/chat', json={'message': message}, environ_base=environ).get_json()
+               for message in ('faculty', 'labs')]
+    assert response.get_json()['results'] == singles
+    assert client.post('/chat/batch', json={'messages': 'faculty'}, environ_base=environ).status_code == 400
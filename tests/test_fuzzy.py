@@ -0,0 +1,18 @@
+"""check_secret_pattern (fuzzy index) against the original SequenceMatcher loop"""
+import app
+from bench_fuzzy import generate_corpus, reference_check_secret_pattern
+
+def test_index_matches_reference_on_seeded_corpus():
+    app.SECRET_INDEX.lookup.cache_clear()
+    corpus = generate_corpus(1500)
+    disagreements = [text for text in corpus if app.check_secret_pattern(text) != reference_check_secret_pattern(text)]
+    assert disagreements == []
+    # The corpus has to exercise both outcomes to mean anything
+    assert any(reference_check_secret_pattern(text) for text in corpus)
+
+def test_typos_and_exact_phrases():
+    for text in ['dean approval code 7749', 'deen aproval kode 7749', 'Dean, approvel coed 7-7-4-9!',
+                 'dean permission access code seven seven four nine']:
+        assert app.check_secret_pattern(text) is reference_check_secret_pattern(text) is True
+    for text in ['dean approval code', 'approval code 7749', 'what are the fees', '']:
+        assert app.check_secret_pattern(text) is reference_check_secret_pattern(text) is False
@@ -0,0 +1,60 @@
+"""Hot reload of the knowledge base, including edits that must be rejected"""
+import json
+import os
+
+import pytest
+
+import app
+from knowledge import KnowledgeStore, compile_blob
+
+REQUIRED = {'about': None, 'admissions': ('fees',)}
+
+def write(path, content, tick):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content if isinstance(content, str) else json.dumps(content))
+    # Distinct mtimes even on filesystems with coarse timestamps
+    os.utime(path, ns=(tick * 10**9, tick * 10**9))
+
+@pytest.fixture
+def store(tmp_path):
+    source = tmp_path / 'knowledge.json'
+    write(source, {'about': 'v1', 'admissions': {'fees': 'one lakh'}}, 1)
+    return KnowledgeStore(str(source), str(tmp_path / 'knowledge.bin'), check_interval=0, required=REQUIRED)
+
+@pytest.mark.parametrize('bad', [
+    '{"about": "v2", "admissions": {"fees": ',
+    {'about': 'v2', 'admissions': {'fees': 120000}},
+    {'about': 'v2', 'admissions': {'seats': 'many'}},
+    {'about': ['v2'], 'admissions': {'fees': 'two lakh'}},
+])
+def test_bad_edit_keeps_old_snapshot(store, bad):
+    write(store.source_path, bad, 2)
+    assert store.refresh() is False
+    assert store.snapshot()['about'] == 'v1'
+
+    write(store.source_path, {'about': 'v3', 'admissions': {'fees': 'three lakh'}}, 3)
+    assert store.refresh() is True
+    assert store.snapshot()['admissions']['fees'] == 'three lakh'
+
+def test_compile_rejects_missing_required_key(tmp_path):
+    source = tmp_path / 'knowledge.json'
+    write(source, {'about': 'x'}, 1)
+    with pytest.raises(ValueError):
+        compile_blob(str(source), str(tmp_path / 'knowledge.bin'), REQUIRED)
+    assert not (tmp_path / 'knowledge.bin').exists()
+
+def test_app_keeps_serving_after_bad_edit(tmp_path, monkeypatch):
+    source = tmp_path / 'knowledge.json'
+    with open(app.KNOWLEDGE_PATH, encoding='utf-8') as f:
+        knowledge = json.load(f)
+    write(source, knowledge, 1)
+    store = KnowledgeStore(str(source), str(tmp_path / 'knowledge.bin'), check_interval=0,
+                           required=app.KNOWLEDGE_REQUIRED)
+    monkeypatch.setattr(app, 'KNOWLEDGE', store)
+
+    knowledge['admissions']['fees'] = 120000
+    write(source, knowledge, 2)
+    client = app.app.test_client()
+    assert client.get('/', environ_base={'REMOTE_ADDR': '192.0.2.40'}).status_code == 200
+    response = client.post('/chat', json={'message': 'what are the fees'}, environ_base={'REMOTE_ADDR': '192.0.2.40'})
+    assert response.status_code == 200
@@ -0,0 +1,32 @@
+"""Stage timings recorded for the /chat endpoints"""
+import re
+
+import app
+
+STAGES = ('secret_check', 'injection_scan', 'routing', 'total')
+
+def stage_counts():
+    text = app.render_metrics()
+    return {stage: int(re.search(rf'stage_seconds_count{{stage="{stage}"}} (\d+)', text).group(1))
+            for stage in STAGES if f'stage="{stage}"' in text}
+
+def test_stream_records_stage_timings():
+    before = stage_counts()
+    client = app.app.test_client()
+    response = client.post('/chat/stream', json={'message': 'which labs does the campus have for metrics'},
+                           environ_base={'REMOTE_ADDR': '192.0.2.30'})
+    assert response.data.endswith(b'{"done":true}\n')
+    after = stage_counts()
+    assert all(after[stage] == before.get(stage, 0) + 1 for stage in STAGES)
+
+def test_metrics_route_is_off_by_default():
+    assert app.app.test_client().get('/metrics').status_code == 404
+
+def test_metrics_route_needs_the_token(monkeypatch):
+    monkeypatch.setattr(app, 'METRICS_TOKEN', 'scrape-secret')
+    client = app.app.test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert b'stage_seconds' in response.data
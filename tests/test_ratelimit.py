@@ -0,0 +1,49 @@
+"""Batch costs and bucket ordering in the /chat rate limits (default 5:30 per IP, 2:15 per session)"""
+import math
+
+import app
+
+def test_batch_larger_than_a_burst_is_rejected():
+    client = app.app.test_client()
+    response = client.post('/chat/batch', json={'messages': ['hi'] * 50}, environ_base={'REMOTE_ADDR': '192.0.2.1'})
+    assert response.status_code == 413
+    assert app.batch_max_size() == 15
+
+def test_batch_pays_its_full_cost():
+    ip = '192.0.2.2'
+    assert app.rate_limit_delay(ip, None, 30) == 0.0
+    assert app.rate_limit_delay(ip, None, 1) > 0
+    assert app.rate_limit_delay(ip, None, 31) == math.inf
+
+def test_ip_rejection_keeps_session_tokens():
+    ip, session_id = '192.0.2.3', 'test-session-refund'
+    assert app.rate_limit_delay(ip, None, 30) == 0.0
+    assert app.rate_limit_delay(ip, session_id, 15) > 0
+    assert app.SESSION_BUCKETS.acquire(session_id, 15) == 0.0
+
+def test_busy_session_is_slowed_not_locked_out():
+    session_id = app.SESSIONS.create()
+    app.SESSIONS.incr_attempts(session_id, 800)
+    assert app.rate_limit_delay('192.0.2.4', session_id, 1) == 0.0
+    delay = app.rate_limit_delay('192.0.2.4', session_id, 1)
+    assert 0 < delay < math.inf
+
+def test_forwarded_ip_ignores_client_supplied_entries(monkeypatch):
+    monkeypatch.setattr(app, 'TRUST_PROXY', 1)
+    assert app.forwarded_ip('6.6.6.6, 203.0.113.5', '10.0.0.1') == '203.0.113.5'
+    assert app.forwarded_ip('203.0.113.5', '10.0.0.1') == '203.0.113.5'
+    monkeypatch.setattr(app, 'TRUST_PROXY', 2)
+    assert app.forwarded_ip('6.6.6.6, 203.0.113.5, 10.0.0.2', '10.0.0.1') == '203.0.113.5'
+    assert app.forwarded_ip('203.0.113.5', '10.0.0.1') == '10.0.0.1'
+    monkeypatch.setattr(app, 'TRUST_PROXY', 0)
+    assert app.forwarded_ip('6.6.6.6', '10.0.0.1') == '10.0.0.1'
+
+def test_rotating_forwarded_for_cannot_dodge_the_ip_limit(monkeypatch):
+    monkeypatch.setattr(app, 'TRUST_PROXY', 1)
+    client = app.app.test_client()
+    statuses = [
+        client.post('/chat/batch', json={'messages': ['hi']},
+                    headers={'X-Forwarded-For': f'198.51.100.{number}, 192.0.2.5'}).status_code
+        for number in range(40)
+    ]
+    assert 429 in statuses
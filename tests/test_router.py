@@ -0,0 +1,33 @@
+"""generate_smart_response answers pinned in benchmarks/golden_responses.json"""
+import json
+
+import app
+from bench_router import GOLDEN_PATH, digest, generate_corpus
+
+def test_answers_match_golden_file():
+    with open(GOLDEN_PATH, encoding='utf-8') as f:
+        golden = json.load(f)
+    changed = [query for query in generate_corpus() if digest(app.generate_smart_response(query)) != golden[query]]
+    assert changed == [], f"{len(changed)} answers changed; re-pin with python benchmarks/bench_router.py --update"
+
+def test_several_topics_are_merged():
+    assert app.resolve_intent("hostel fees") == ("search", (("admissions", "fees"), ("infrastructure", "hostel")))
+    assert app.resolve_intent("cse and ece") == ("search", (("courses", "cse"), ("courses", "ece")))
+
+def test_one_topic_keeps_its_route():
+    assert app.resolve_intent("hostel and library") == ("infrastructure", ("library", "hostel"))
+    assert app.resolve_intent("placements") == ("placements", ())
+
+def test_stream_serves_cached_answers():
+    key = app.resolve_intent("hostel fees")
+    entry = app.RESPONSE_CACHE.get(key)
+    hits = app.RESPONSE_CACHE.hits
+    assert ''.join(app.stream_message("hostel fees")) == entry.text
+    assert app.RESPONSE_CACHE.hits == hits + 1
+
+def test_topic_without_section_keeps_its_full_answer():
+    _, merged = app.resolve_intent("what courses and placements")
+    assert set(merged) == set(app.INTENT_DEFAULTS["courses"] + app.INTENT_DEFAULTS["placements"])
+    _, merged = app.resolve_intent("cse and ece and where is it")
+    assert merged[:2] == (("courses", "cse"), ("courses", "ece"))
+    assert set(merged[2:]) == set(app.INTENT_DEFAULTS["location"])
@@ -0,0 +1,25 @@
+"""Session store bounds and when the app starts a session"""
+import app
+from sessions import MemorySessionStore
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(ttl=3600, max_sessions=4, shards=1)
+    first, second = store.create(), store.create()
+    store.create(), store.create()
+    assert store.exists(first)
+    store.create()
+    assert store.exists(first)
+    assert not store.exists(second)
+    assert store.totals()['active_sessions'] == 4
+
+def test_index_starts_no_session():
+    client = app.app.test_client()
+    response = client.get('/', environ_base={'REMOTE_ADDR': '192.0.2.10'})
+    assert response.status_code == 200
+    assert 'Set-Cookie' not in response.headers
+
+def test_first_chat_starts_a_session():
+    client = app.app.test_client()
+    response = client.post('/chat', json={'message': 'hello'}, environ_base={'REMOTE_ADDR': '192.0.2.11'})
+    assert response.status_code == 200
+    assert app.SESSION_COOKIE in response.headers['Set-Cookie']